@@ -0,0 +1,118 @@
+"""
+Precompiled lexicon of every letter and example word in URDU_ALPHABET_DATA.
+
+An Aho-Corasick automaton is built once per process, then finds every known
+letter and word in a single linear pass over a text. Matches count only as
+whole tokens, so the ب inside بلی or the بلی inside بلیاں aren't picked up.
+"""
+
+import threading
+import unicodedata
+from collections import deque
+
+from tutor_intents import QUESTION_WORDS
+from urdu_alphabet_data import URDU_ALPHABET_DATA
+
+LETTER = "letter"
+WORD = "word"
+
+
+def _is_word_char(char):
+    # Diacritics (combining marks) belong to the token they sit on
+    return char.isalnum() or char == "_" or unicodedata.category(char) == "Mn"
+
+
+class AlphabetLexicon:
+    """Aho-Corasick automaton over a {term: kind} mapping."""
+
+    def __init__(self, terms):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]  # per node: (length, kind) of the terms ending there
+        for term, kind in terms.items():
+            self._add(term, kind)
+        self._link()
+
+    def _add(self, term, kind):
+        node = 0
+        for char in term:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = nxt
+        self._output[node].append((len(term), kind))
+
+    def _link(self):
+        # Breadth-first failure links; each node also inherits its fail
+        # node's outputs so matching never has to walk the fail chain
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text, final=True):
+        """Whole-token matches as sorted (start, end, kind), without overlaps.
+
+        With final=False, a match touching the end of `text` is left out,
+        since the token may still be growing (streaming).
+        """
+        matches = []
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for length, kind in self._output[node]:
+                start, end = index + 1 - length, index + 1
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if end < len(text):
+                    if _is_word_char(text[end]):
+                        continue
+                elif not final:
+                    continue
+                matches.append((start, end, kind))
+        # Whole-token matches can only overlap when they are the same span
+        matches.sort(key=lambda match: (match[0], match[2] != LETTER))
+        result = []
+        for match in matches:
+            if not result or match[0] >= result[-1][1]:
+                result.append(match)
+        return result
+
+
+def lexicon_terms():
+    """{term: kind} for every letter and example word in the alphabet data."""
+    terms = {}
+    for letter in URDU_ALPHABET_DATA["letters"]:
+        for word in letter.get("words", []):
+            # Example words that are also everyday filler (یہ) would light up
+            # nearly every sentence
+            if word["word"] not in QUESTION_WORDS:
+                terms.setdefault(word["word"], WORD)
+        # A standalone letter is the letter, even if some word is spelled the same
+        terms[letter["letter"]] = LETTER
+    return terms
+
+
+_lexicon = None
+_lexicon_lock = threading.Lock()
+
+
+def get_lexicon() -> AlphabetLexicon:
+    """The alphabet lexicon, compiled once per process."""
+    global _lexicon
+    with _lexicon_lock:
+        if _lexicon is None:
+            _lexicon = AlphabetLexicon(lexicon_terms())
+        return _lexicon
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Pre-rendered audio bundle for the Urdu Alphabet Adventure and tutor bot.
+
+Walks every letter and example word in URDU_ALPHABET_DATA, the app's fixed
+voice prompts and the tutor's templated letter answers, synthesizes each
+once, and writes a versioned bundle directory with a manifest. The apps load
+the bundle at startup so the letter-detail page, sound game, guided practice
+and single-letter tutor answers never synthesize at request time.
+
+Usage:
+    python audio_bundle.py [--out audio_bundle] [--engine gtts] [--workers 4]
+
+Build the bundle with the engine that comes first in URDU_TTS_ENGINES; the
+app only uses a bundle made by its primary engine.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from audio_postprocess import AudioPostProcessor
+from tts_engines import ENGINE_TYPES, TTSChain, get_tts_chain
+from tutor_router import all_letter_answers
+from urdu_alphabet_data import (
+    ALPHABET_RECITAL_TEXT,
+    GAMES_GUIDE_TEXT,
+    GUIDED_PRACTICE_TEXT,
+    LETTER_PROMPT_TEMPLATE,
+    SOUND_GAME_PROMPT,
+    URDU_ALPHABET_DATA,
+)
+
+BUNDLE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+DEFAULT_BUNDLE_DIR = os.getenv(
+    "URDU_AUDIO_BUNDLE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "audio_bundle"),
+)
+
+
+def bundle_texts():
+    """Every fixed utterance the apps can speak, in a stable order."""
+    texts = [GUIDED_PRACTICE_TEXT, ALPHABET_RECITAL_TEXT, GAMES_GUIDE_TEXT, SOUND_GAME_PROMPT]
+    for letter in URDU_ALPHABET_DATA["letters"]:
+        texts.append(letter["letter"])
+        texts.append(LETTER_PROMPT_TEMPLATE.format(letter=letter["letter"]))
+        texts.extend(word["word"] for word in letter.get("words", []))
+    texts.extend(all_letter_answers())
+    # De-duplicate while keeping order (several words repeat across letters)
+    return list(dict.fromkeys(texts))
+
+
+def _version_dir(bundle_dir):
+    return os.path.join(bundle_dir, f"v{BUNDLE_VERSION}")
+
+
+def build_bundle(engine, bundle_dir=DEFAULT_BUNDLE_DIR, lang="ur", workers=4):
+    """Synthesize every bundle text with `engine` and write clips plus a manifest.
+
+    Clips already in the shared audio cache are reused, so rebuilding after a
+    dataset edit only synthesizes the new text. Returns the manifest dict.
+    """
+    out_dir = _version_dir(bundle_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    chain = TTSChain([engine], postprocessor=AudioPostProcessor.from_env())
+    texts = bundle_texts()
+
+    def render(text):
+        return text, chain.cache_key(engine, text, lang), chain.synthesize(text, lang)
+
+    clips = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for text, key, audio in pool.map(render, texts):
+            if not audio:
+                print(f"warning: no audio for {text!r}", file=sys.stderr)
+                continue
+            filename = f"{key}.mp3"
+            with open(os.path.join(out_dir, filename), "wb") as f:
+                f.write(audio)
+            clips[key] = {"text": text, "file": filename, "bytes": len(audio)}
+
+    manifest = {
+        "bundle_version": BUNDLE_VERSION,
+        "engine": engine.name,
+        "engine_version": chain.engine_version(engine),
+        "lang": lang,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "postprocess": {k: v for k, v in chain.postprocessor.report().items() if k != "recent"},
+        "clips": clips,
+    }
+    tmp_path = os.path.join(out_dir, MANIFEST_NAME + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, os.path.join(out_dir, MANIFEST_NAME))
+    return manifest
+
+
+def load_bundle(bundle_dir=DEFAULT_BUNDLE_DIR, engine="gtts", version=""):
+    """Load bundle clips as {cache key: bytes}.
+
+    Returns an empty dict when no bundle was built or it was built by a
+    different engine/version, so callers fall back to live synthesis.
+    """
+    out_dir = _version_dir(bundle_dir)
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("engine") != engine or manifest.get("engine_version") != version:
+        return {}
+
+    clips = {}
+    for key, entry in manifest.get("clips", {}).items():
+        try:
+            with open(os.path.join(out_dir, entry["file"]), "rb") as f:
+                clips[key] = f.read()
+        except (OSError, KeyError):
+            continue
+    return clips
+
+
+_loaded_bundles = {}
+_loaded_bundles_lock = threading.Lock()
+
+
+def get_bundle(bundle_dir=DEFAULT_BUNDLE_DIR, engine="gtts", version=""):
+    """Process-wide memoized load_bundle(), safe to call from worker threads."""
+    key = (bundle_dir, engine, version)
+    with _loaded_bundles_lock:
+        if key not in _loaded_bundles:
+            _loaded_bundles[key] = load_bundle(bundle_dir, engine=engine, version=version)
+        return _loaded_bundles[key]
+
+
+def get_primary_bundle():
+    """The bundle built by the shared TTS chain's primary engine, or {}."""
+    chain = get_tts_chain()
+    primary = chain.primary()
+    if primary is None:
+        return {}
+    return get_bundle(engine=primary.name, version=chain.engine_version(primary))
+
+
+def bundled_audio(text, lang="ur"):
+    """Pre-rendered clip for `text`, or None if it isn't in the bundle."""
+    chain = get_tts_chain()
+    primary = chain.primary()
+    if primary is None:
+        return None
+    return get_primary_bundle().get(chain.cache_key(primary, text, lang))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render the alphabet app's audio bundle.")
+    parser.add_argument("--out", default=DEFAULT_BUNDLE_DIR, help="bundle directory")
+    parser.add_argument("--lang", default="ur")
+    parser.add_argument("--engine", default="gtts", choices=sorted(ENGINE_TYPES))
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    started = time.time()
+    engine = ENGINE_TYPES[args.engine]()
+    if not engine.available():
+        parser.error(f"TTS engine {args.engine!r} is not installed")
+    manifest = build_bundle(engine, args.out, lang=args.lang, workers=args.workers)
+    total_bytes = sum(clip["bytes"] for clip in manifest["clips"].values())
+    print(
+        f"Wrote {len(manifest['clips'])} clips ({total_bytes / 1024:.0f} KiB) "
+        f"to {_version_dir(args.out)} in {time.time() - started:.1f}s"
+    )
+    report = manifest["postprocess"]
+    if report["clips"]:
+        print(f"Post-processing ({report['profile']}) saved {report['saved'] / 1024:.0f} KiB "
+              f"({report['saved_ratio']:.0%}) across {report['clips']} new clips")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Shared TTS audio cache for the Urdu learning apps.
+
+Clips are content-addressed: the key is a SHA-256 of the text, language and
+the engine/version that produced the audio, so a new engine release never
+serves stale audio. Two tiers are used:
+
+- an in-process LRU bounded by total bytes (a hit is a dictionary lookup)
+- an on-disk directory shared by every session and worker process,
+  bounded by total bytes with least-recently-used files evicted first
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "URDU_AUDIO_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".audio_cache"),
+)
+DEFAULT_MAX_MEMORY_BYTES = int(os.getenv("URDU_AUDIO_CACHE_MEMORY_BYTES", 32 * 1024 * 1024))
+DEFAULT_MAX_DISK_BYTES = int(os.getenv("URDU_AUDIO_CACHE_DISK_BYTES", 512 * 1024 * 1024))
+
+
+def audio_cache_key(text: str, lang: str, engine: str, version: str = "") -> str:
+    """Return the content address for a clip of `text` spoken by `engine`."""
+    raw = "\x1f".join([engine, version, lang, text])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """Two-tier (memory LRU + shared disk) cache of encoded audio clips."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_memory_bytes=DEFAULT_MAX_MEMORY_BYTES,
+                 max_disk_bytes=DEFAULT_MAX_DISK_BYTES, suffix=".mp3"):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.suffix = suffix
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = None  # measured lazily on the first write
+        self._lock = threading.Lock()
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+    # ----- public API -----
+    def get(self, key: str):
+        """Return cached bytes for `key`, or None on a miss."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return data
+
+        data = self._read_disk(key)
+        with self._lock:
+            if data is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            self._remember(key, data)
+        return data
+
+    def put(self, key: str, data: bytes):
+        """Store `data` in both tiers. Empty payloads are never cached."""
+        if not data:
+            return
+        with self._lock:
+            self._remember(key, data)
+            self._counters["writes"] += 1
+        self._write_disk(key, data)
+
+    def get_or_create(self, key: str, create):
+        """Return cached bytes for `key`, calling `create()` to fill a miss."""
+        data = self.get(key)
+        if data is not None:
+            return data
+        data = create()
+        self.put(key, data)
+        return data
+
+    def stats(self) -> dict:
+        """Hit/miss counters plus current tier sizes."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_items"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_bytes
+            stats["disk_bytes"] = self._disk_bytes
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    # ----- memory tier -----
+    def _remember(self, key, data):
+        """Insert into the LRU; caller holds the lock."""
+        if len(data) > self.max_memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._counters["memory_evictions"] += 1
+
+    # ----- disk tier -----
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + self.suffix)
+
+    def _read_disk(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # Bump mtime so disk eviction approximates LRU across processes
+            os.utime(path, None)
+        except OSError:
+            return None
+        return data or None
+
+    def _write_disk(self, key, data):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write-then-rename so concurrent readers never see a partial clip
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._measure_disk()
+            else:
+                self._disk_bytes += len(data)
+            over_budget = self._disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self._evict_disk()
+
+    def _disk_entries(self):
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(self.suffix):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    info = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((info.st_mtime, info.st_size, path))
+        return entries
+
+    def _measure_disk(self):
+        return sum(size for _, size, _ in self._disk_entries())
+
+    def _evict_disk(self):
+        """Drop least-recently-used files until the disk tier is at 90% of its budget."""
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_disk_bytes * 0.9)
+        evicted = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_bytes = total
+            self._counters["disk_evictions"] += evicted
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_audio_cache() -> AudioCache:
+    """Process-wide cache instance; survives Streamlit reruns and sessions."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = AudioCache()
+        return _shared_cache
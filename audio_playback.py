@@ -0,0 +1,109 @@
+"""
+In-page audio playback for the Urdu apps.
+
+Clips are handed to st.audio, so Streamlit's media endpoint serves them from
+the app's own origin under their content hash: nothing is inlined as base64
+and no second port has to be reachable. The player is hidden, since the apps
+only ever autoplay. With the opt-in audio endpoint (audio_server) clips are
+referenced by their immutable URL there instead.
+
+Several clips can't all autoplay at once, so ClipSequence sends each one
+when the one before it should have finished, timed from the clips' own
+headers. Clips still being synthesized are sent as soon as they are ready,
+so an answer starts playing with its first sentence.
+"""
+
+import collections
+import time
+import uuid
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+from audio_sequence import clip_duration_ms, stitch_mp3_cached, synthesis_result
+from audio_server import _content_type, ensure_audio_server, publish_audio
+
+# Hides the container holding an autoplaying clip (its class is st-key-<key>)
+_HIDDEN_KEY_PREFIX = "urdu-autoplay-"
+_HIDE_STYLE = f"<style>[class*='st-key-{_HIDDEN_KEY_PREFIX}'] {{ display: none; }}</style>"
+
+
+def autoplay_audio(audio_bytes: bytes, container=None):
+    """Play a clip once, without showing a player, in `container` (default: here)."""
+    if not audio_bytes:
+        return
+    target = container if container is not None else st
+    if ensure_audio_server():
+        with target.container():
+            components.html(
+                f'<audio src="{publish_audio(audio_bytes)}" autoplay></audio>',
+                height=0,
+            )
+        return
+    with target.container(key=_HIDDEN_KEY_PREFIX + uuid.uuid4().hex):
+        st.markdown(_HIDE_STYLE, unsafe_allow_html=True)
+        st.audio(audio_bytes, format=_content_type(audio_bytes), autoplay=True)
+
+
+class ClipSequence:
+    """Autoplays clips one after another in its own placeholder.
+
+    Clips (or futures resolving to them) are queued with add(). poll() sends
+    whatever is ready without blocking, e.g. between streamed tokens; drain()
+    waits for the rest. Each clip is sent once the previous one should have
+    ended (plus `gap_ms`); clips whose length can't be read are allowed
+    `default_ms`.
+    """
+
+    def __init__(self, gap_ms=350, default_ms=1200, container=None):
+        self._box = (container if container is not None else st).container()
+        self.gap_ms = gap_ms
+        self.default_ms = default_ms
+        self.played = False
+        self._pending = collections.deque()
+        self._next_start = 0.0
+
+    def add(self, clip_or_future):
+        self._pending.append(clip_or_future)
+
+    def play(self, clip):
+        """Queue a clip and wait until it has been sent."""
+        self.add(clip)
+        self.drain()
+
+    def poll(self):
+        while self._pending and _is_ready(self._pending[0]) and time.monotonic() >= self._next_start:
+            self._send(_resolve(self._pending.popleft()))
+
+    def drain(self):
+        while self._pending:
+            if all(_is_ready(item) for item in self._pending):
+                # Everything left is synthesized: one stitched clip, sent once
+                clips = [_resolve(item) for item in self._pending]
+                track = stitch_mp3_cached(clips, gap_ms=self.gap_ms) if len(clips) > 1 else b""
+                if track:
+                    self._pending.clear()
+                    self._pending.append(track)
+            clip = _resolve(self._pending[0])
+            delay = self._next_start - time.monotonic()
+            if delay > 0 and clip:
+                time.sleep(delay)
+            self._pending.popleft()
+            self._send(clip)
+
+    def _send(self, clip):
+        if not clip:
+            return
+        autoplay_audio(clip, container=self._box)
+        self.played = True
+        duration_ms = clip_duration_ms(clip) or self.default_ms
+        self._next_start = time.monotonic() + (duration_ms + self.gap_ms) / 1000
+
+
+def _is_ready(item):
+    return not hasattr(item, "done") or item.done()
+
+
+def _resolve(item):
+    """The clip itself, or a future's clip (b"" if it failed or timed out)."""
+    return synthesis_result(item) if hasattr(item, "result") else item
@@ -0,0 +1,128 @@
+"""
+Post-processing for synthesized speech before it is cached and shipped.
+
+TTS output carries leading/trailing silence, uneven loudness and a fixed
+bitrate. The pipeline here trims the silence, normalizes loudness and can
+re-encode to a compact speech bitrate or codec. With ffmpeg on PATH the full
+pipeline runs; without it, MP3 silence is still trimmed at the frame level.
+
+Processed clips are stored in the shared audio cache in place of the raw
+engine output (the processing profile is part of the cache key), and every
+clip's before/after size is kept for reporting.
+
+Configuration:
+- URDU_AUDIO_POSTPROCESS  comma list of steps: "trim", "normalize", or "off"
+                          (default "trim,normalize")
+- URDU_AUDIO_CODEC        "mp3" (default, keeps sequence stitching) or "opus"
+- URDU_AUDIO_BITRATE      target bitrate, e.g. "24k" (default)
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+from collections import deque
+
+from audio_sequence import trim_mp3_silence
+
+SILENCE_THRESHOLD_DB = -50
+LOUDNESS_TARGET = "I=-16:TP=-1.5:LRA=11"  # EBU R128 speech target
+
+
+class AudioPostProcessor:
+    """Trim, normalize and re-encode clips; keeps a per-clip savings report."""
+
+    def __init__(self, trim=True, normalize=True, codec="mp3", bitrate="24k", ffmpeg=None,
+                 timeout=5.0, report_size=200):
+        self.trim = trim
+        self.normalize = normalize
+        self.codec = codec
+        self.bitrate = bitrate
+        self.ffmpeg = ffmpeg if ffmpeg is not None else shutil.which("ffmpeg")
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._totals = {"clips": 0, "bytes_in": 0, "bytes_out": 0}
+        self._recent = deque(maxlen=report_size)
+
+    @classmethod
+    def from_env(cls):
+        steps = {s.strip() for s in os.getenv("URDU_AUDIO_POSTPROCESS", "trim,normalize").split(",")}
+        return cls(
+            trim="trim" in steps,
+            normalize="normalize" in steps,
+            codec=os.getenv("URDU_AUDIO_CODEC", "mp3"),
+            bitrate=os.getenv("URDU_AUDIO_BITRATE", "24k"),
+        )
+
+    @property
+    def enabled(self):
+        return self.trim or self.normalize or (self.ffmpeg is not None and self.codec != "mp3")
+
+    @property
+    def profile(self) -> str:
+        """Identifies the processing applied; part of the audio cache key."""
+        if not self.enabled:
+            return ""
+        if self.ffmpeg is None:
+            return "frametrim" if self.trim else ""
+        steps = [name for name, on in (("trim", self.trim), ("norm", self.normalize)) if on]
+        return "+".join(steps + [f"{self.codec}@{self.bitrate}"])
+
+    def process(self, audio: bytes, label: str = "") -> bytes:
+        """Return the processed clip, or the original if processing fails."""
+        if not audio or not self.profile:
+            return audio
+        if self.ffmpeg is not None:
+            processed = self._run_ffmpeg(audio)
+        else:
+            processed = trim_mp3_silence(audio)
+        if not processed:
+            processed = audio
+        self._record(label, len(audio), len(processed))
+        return processed
+
+    def _run_ffmpeg(self, audio):
+        filters = []
+        if self.trim:
+            # Trim the start, reverse, trim the (former) end, reverse back
+            trim = f"silenceremove=start_periods=1:start_threshold={SILENCE_THRESHOLD_DB}dB:start_silence=0.05"
+            filters += [trim, "areverse", trim, "areverse"]
+        if self.normalize:
+            filters.append(f"loudnorm={LOUDNESS_TARGET}")
+        if self.codec == "opus":
+            encode = ["-c:a", "libopus", "-application", "voip", "-b:a", self.bitrate, "-f", "ogg"]
+        else:
+            # Stay at 24 kHz mono MPEG-2 like gTTS so clips still stitch together
+            encode = ["-c:a", "libmp3lame", "-ar", "24000", "-b:a", self.bitrate, "-f", "mp3"]
+        command = [self.ffmpeg, "-loglevel", "error", "-i", "pipe:0", "-ac", "1"]
+        if filters:
+            command += ["-af", ",".join(filters)]
+        command += ["-map_metadata", "-1"] + encode + ["pipe:1"]
+        try:
+            return subprocess.run(command, input=audio, capture_output=True, timeout=self.timeout,
+                                  check=True).stdout
+        except (OSError, subprocess.SubprocessError):
+            return b""
+
+    def _record(self, label, bytes_in, bytes_out):
+        with self._lock:
+            self._totals["clips"] += 1
+            self._totals["bytes_in"] += bytes_in
+            self._totals["bytes_out"] += bytes_out
+            self._recent.append({
+                "label": label[:40],
+                "bytes_in": bytes_in,
+                "bytes_out": bytes_out,
+                "saved": bytes_in - bytes_out,
+            })
+
+    def report(self) -> dict:
+        """Totals plus the most recent clips with bytes saved for each."""
+        with self._lock:
+            totals = dict(self._totals)
+            recent = list(self._recent)
+        totals["saved"] = totals["bytes_in"] - totals["bytes_out"]
+        totals["saved_ratio"] = totals["saved"] / totals["bytes_in"] if totals["bytes_in"] else 0.0
+        totals["profile"] = self.profile
+        totals["recent"] = recent
+        return totals
@@ -0,0 +1,380 @@
+"""
+Helpers for building multi-clip audio sequences.
+
+Sequences (a letter followed by its example words, a prompt followed by a
+letter) are synthesized concurrently on a bounded, process-wide worker pool
+so page-open latency is the slowest clip rather than the sum of all clips.
+
+They can then be stitched server-side into one MP3 with silence gaps, so the
+browser fetches and decodes a single asset instead of timing N <audio> tags.
+Stitching works at the MP3 frame level (no decoder needed): tags and the
+encoder's Xing/Info frame are dropped, frames are concatenated, and gaps are
+filled with all-zero Layer III frames, which decode to exact digital silence.
+
+Long narration is split at sentence and comma boundaries so each chunk can be
+synthesized (and cached) on its own and playback can begin with the first.
+"""
+
+import contextvars
+import hashlib
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from audio_cache import get_audio_cache
+
+TTS_WORKERS = int(os.getenv("URDU_TTS_WORKERS", "4"))
+# Unset: one item may take the TTS chain's whole budget (see item_timeout())
+TTS_ITEM_TIMEOUT = float(os.getenv("URDU_TTS_ITEM_TIMEOUT", "0")) or None
+
+# One pool per process: every session shares the same bound on concurrent
+# synthesis calls instead of each rerun spawning its own threads.
+_synthesis_pool = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
+
+
+def item_timeout():
+    """Seconds one synthesis may run: URDU_TTS_ITEM_TIMEOUT, else the TTS chain's whole budget."""
+    if TTS_ITEM_TIMEOUT is not None:
+        return TTS_ITEM_TIMEOUT
+    from tts_engines import get_tts_chain
+
+    return get_tts_chain().budget()
+
+
+def submit_synthesis(fn, *args):
+    """Run `fn(*args)` on the shared synthesis pool and return its future.
+
+    The caller's context variables (e.g. the outbound scheduler's session)
+    carry over to the pool thread. The future's `started` list gets the
+    time a pool thread picked the work up.
+    """
+    started = []
+
+    def run():
+        started.append(time.monotonic())
+        return fn(*args)
+
+    future = _synthesis_pool.submit(contextvars.copy_context().run, run)
+    future.started = started
+    return future
+
+
+def synthesis_result(future, timeout=None):
+    """A submit_synthesis() result, or b"" if it failed or overran.
+
+    The `timeout` (default item_timeout()) runs from when the work started,
+    not from submission, so time spent queued behind other clips on the
+    pool doesn't count against it.
+    """
+    if timeout is None:
+        timeout = item_timeout()
+    while True:
+        begun = future.started[0] if future.started else None
+        wait = begun + timeout - time.monotonic() if begun is not None else 0.05
+        try:
+            return future.result(timeout=max(wait, 0)) or b""
+        except Exception:
+            if future.done() or begun is not None:
+                return b""
+
+
+def synthesize_sequence(texts, synthesize, timeout=None):
+    """Run `synthesize(text)` for every text concurrently, keeping input order.
+
+    Each item gets `timeout` seconds (default item_timeout()) from when it
+    starts running; an item that times out or raises comes back as b"" so
+    one slow clip cannot block the page. Timed out work keeps running in the
+    background and still warms the audio cache for the next request.
+    """
+    futures = [submit_synthesis(synthesize, text) for text in texts]
+    return [synthesis_result(future, timeout) for future in futures]
+
+
+# ===== CHUNKING =====
+# Urdu full stop, question mark and comma plus their Latin counterparts
+_CLAUSE_RE = re.compile(r"[^۔؟!?،,:;.\n]+[۔؟!?،,:;.\n]*")
+
+
+def split_for_tts(text, max_chars=80):
+    """Split `text` into chunks at sentence/comma boundaries.
+
+    The first clause is always its own chunk so playback can start as early
+    as possible; later clauses are packed up to `max_chars` to keep the number
+    of synthesis calls down.
+    """
+    clauses = [c.strip() for c in _CLAUSE_RE.findall(text) if c.strip()]
+    if not clauses:
+        return []
+    chunks = [clauses[0]]
+    current = ""
+    for clause in clauses[1:]:
+        if current and len(current) + 1 + len(clause) > max_chars:
+            chunks.append(current)
+            current = clause
+        else:
+            current = f"{current} {clause}" if current else clause
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+_SENTENCE_END_RE = re.compile(r"[۔؟!?\n]+|\.(?=\s)")
+
+
+class SentenceBuffer:
+    """Collects streamed text and hands back each sentence once it is complete."""
+
+    def __init__(self):
+        self._pending = ""
+
+    def feed(self, text):
+        """Add streamed text; return the sentences it completed (possibly none)."""
+        self._pending += text
+        sentences = []
+        start = 0
+        for match in _SENTENCE_END_RE.finditer(self._pending):
+            sentence = self._pending[start:match.end()].strip()
+            if sentence:
+                sentences.append(sentence)
+            start = match.end()
+        self._pending = self._pending[start:]
+        return sentences
+
+    def flush(self):
+        """Return whatever trailing text never got a sentence terminator."""
+        rest, self._pending = self._pending.strip(), ""
+        return [rest] if rest else []
+
+
+# ===== MP3 STITCHING =====
+_BITRATES_KBPS = {
+    "mpeg1": [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    "mpeg2": [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+# Containers the TTS engines can produce besides MP3 (WAV, Ogg/Opus, FLAC)
+_NON_MP3_MAGIC = (b"RIFF", b"OggS", b"fLaC")
+
+
+def _parse_frame_header(data, offset):
+    """Decode a Layer III frame header at `offset`, or return None if there isn't one."""
+    if offset + 4 > len(data) or data[offset] != 0xFF or (data[offset + 1] & 0xE0) != 0xE0:
+        return None
+    b1, b2, b3 = data[offset + 1], data[offset + 2], data[offset + 3]
+    version = (b1 >> 3) & 0x3
+    layer = (b1 >> 1) & 0x3
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 0x3
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    bitrate = _BITRATES_KBPS["mpeg1" if version == 3 else "mpeg2"][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    samples_per_frame = 1152 if version == 3 else 576
+    padding = (b2 >> 1) & 0x1
+    return {
+        "version": version,
+        "sample_rate": sample_rate,
+        "mono": (b3 >> 6) == 3,
+        "crc": not (b1 & 0x1),
+        "samples_per_frame": samples_per_frame,
+        "length": samples_per_frame // 8 * bitrate // sample_rate + padding,
+    }
+
+
+def _skip_id3v2(data):
+    if data[:3] != b"ID3" or len(data) < 10:
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _is_info_frame(data, offset, header):
+    """True for the encoder's Xing/Info/VBRI frame, which describes only its own clip."""
+    if header["version"] == 3:
+        side_info = 17 if header["mono"] else 32
+    else:
+        side_info = 9 if header["mono"] else 17
+    tag_offset = offset + 4 + (2 if header["crc"] else 0) + side_info
+    return (data[tag_offset:tag_offset + 4] in (b"Xing", b"Info")
+            or data[offset + 36:offset + 40] == b"VBRI")
+
+
+def _confirms_sync(data, offset, header):
+    """True if the frame at `offset` is followed by another of the same format (or the end).
+
+    Any two bytes can look like a frame sync, so a header found by scanning
+    only counts once the next frame lines up with it.
+    """
+    end = offset + header["length"]
+    if end == len(data) or data[end:end + 3] == b"TAG":
+        return True
+    following = _parse_frame_header(data, end)
+    return (following is not None and following["version"] == header["version"]
+            and following["sample_rate"] == header["sample_rate"])
+
+
+def _mp3_frames(data):
+    """Return (audio frames, first header) for a clip; frames are raw bytes."""
+    frames = []
+    first = None
+    if data[:4] in _NON_MP3_MAGIC:
+        return frames, first
+    offset = _skip_id3v2(data)
+    in_sync = False
+    while offset < len(data):
+        header = _parse_frame_header(data, offset)
+        if header is not None and not in_sync and not _confirms_sync(data, offset, header):
+            header = None
+        if header is None:
+            if data[offset:offset + 3] == b"TAG":
+                break  # ID3v1 trailer
+            in_sync = False
+            offset += 1  # resync past junk
+            continue
+        end = offset + header["length"]
+        if end > len(data):
+            break  # truncated final frame
+        if not (first is None and _is_info_frame(data, offset, header)):
+            frames.append(data[offset:end])
+        first = first or header
+        in_sync = True
+        offset = end
+    return frames, first
+
+
+def clip_duration_ms(data):
+    """Playing time of an MP3, WAV or Ogg/Opus clip, or None if it can't be read."""
+    if data[:4] == b"RIFF":
+        # fmt chunk's byte rate; the data chunk is the rest of the file
+        byte_rate = int.from_bytes(data[28:32], "little")
+        data_at = data.find(b"data", 12)
+        if byte_rate and data_at > 0:
+            return (len(data) - data_at - 8) * 1000 / byte_rate
+        return None
+    if data[:4] == b"OggS":
+        # Granule position of the last page counts 48 kHz samples for Opus
+        last_page = data.rfind(b"OggS")
+        if b"OpusHead" in data[:64] and last_page + 14 <= len(data):
+            return int.from_bytes(data[last_page + 6:last_page + 14], "little") * 1000 / 48000
+        return None
+    frames, header = _mp3_frames(data)
+    if not frames:
+        return None
+    return len(frames) * header["samples_per_frame"] * 1000 / header["sample_rate"]
+
+
+def _silent_frame(frame):
+    """An all-zero Layer III frame with `frame`'s format: decodes to silence."""
+    header = bytearray(frame[:4])
+    header[1] |= 0x01   # no CRC
+    header[2] &= ~0x02  # no padding
+    parsed = _parse_frame_header(bytes(header), 0)
+    return bytes(header) + b"\x00" * (parsed["length"] - 4)
+
+
+def stitch_mp3(clips, gap_ms=350):
+    """Concatenate MP3 clips into one track with `gap_ms` of silence between them.
+
+    Gaps are exact to one frame (24 ms for gTTS's 24 kHz audio). Returns b""
+    if any clip can't be parsed or the clips don't share a sample format, so
+    callers can fall back to playing them separately.
+    """
+    parsed = []
+    for clip in clips:
+        if not clip:
+            continue
+        frames, header = _mp3_frames(clip)
+        if not frames:
+            return b""
+        parsed.append((frames, header))
+    if not parsed:
+        return b""
+    formats = {(h["version"], h["sample_rate"], h["mono"]) for _, h in parsed}
+    if len(formats) != 1:
+        return b""
+
+    first_header = parsed[0][1]
+    frame_ms = first_header["samples_per_frame"] * 1000 / first_header["sample_rate"]
+    silence = _silent_frame(parsed[0][0][0]) * round(gap_ms / frame_ms)
+    out = []
+    for i, (frames, _) in enumerate(parsed):
+        if i:
+            out.append(silence)
+        out.extend(frames)
+    return b"".join(out)
+
+
+def iter_stitched_mp3(clips, gap_ms=350):
+    """Lazily stitch an iterable of clips, yielding MP3 bytes as each clip arrives.
+
+    Used for streaming: the first clip's frames go out before later clips are
+    synthesized. Clips that can't be parsed or don't match the first clip's
+    sample format are skipped.
+    """
+    stream_format = None
+    silence = b""
+    for clip in clips:
+        frames, header = _mp3_frames(clip) if clip else ([], None)
+        if not frames:
+            continue
+        clip_format = (header["version"], header["sample_rate"], header["mono"])
+        if stream_format is None:
+            stream_format = clip_format
+            frame_ms = header["samples_per_frame"] * 1000 / header["sample_rate"]
+            silence = _silent_frame(frames[0]) * round(gap_ms / frame_ms)
+        elif clip_format != stream_format:
+            continue
+        else:
+            yield silence
+        yield b"".join(frames)
+
+
+def _frame_payload_bits(frame, header):
+    """Total Huffman-coded bits (part2_3_length) in a frame; ~0 for silence."""
+    bits = int.from_bytes(frame[4 + (2 if header["crc"] else 0):][:32], "big")
+    width = min(len(frame) - 4, 32) * 8
+    channels = 1 if header["mono"] else 2
+    if header["version"] == 3:
+        offset = 9 + (5 if channels == 1 else 3) + 4 * channels
+        granules, stride = 2, 59
+    else:
+        offset = 8 + (1 if channels == 1 else 2)
+        granules, stride = 1, 63
+    total = 0
+    for _ in range(granules * channels):
+        if offset + 12 > width:
+            break
+        total += (bits >> (width - offset - 12)) & 0xFFF
+        offset += stride
+    return total
+
+
+def trim_mp3_silence(data, max_silent_bits=64, keep_frames=2):
+    """Drop near-silent leading/trailing MP3 frames without decoding.
+
+    Silent frames carry almost no coded audio, so their part2_3_length is a
+    reliable, decoder-free silence signal. `keep_frames` of silence are left
+    at each end so speech onsets aren't clipped. Returns the input unchanged
+    if it can't be parsed.
+    """
+    frames, header = _mp3_frames(data)
+    if not frames:
+        return data
+    loud = [i for i, frame in enumerate(frames) if _frame_payload_bits(frame, header) > max_silent_bits]
+    if not loud:
+        return data
+    start = max(loud[0] - keep_frames, 0)
+    end = min(loud[-1] + 1 + keep_frames, len(frames))
+    return b"".join(frames[start:end])
+
+
+def stitch_mp3_cached(clips, gap_ms=350):
+    """stitch_mp3() memoized in the shared audio cache by the list of parts."""
+    parts = hashlib.sha256(f"gap={gap_ms}".encode())
+    for clip in clips:
+        if clip:
+            parts.update(hashlib.sha256(clip).digest())
+    cache = get_audio_cache()
+    return cache.get_or_create("stitch-" + parts.hexdigest(), lambda: stitch_mp3(clips, gap_ms))
@@ -0,0 +1,462 @@
+"""
+Opt-in audio endpoint for the Urdu apps.
+
+By default clips play in the page through Streamlit's own media endpoint
+(audio_playback). Where a second port can be exposed, this endpoint serves
+them instead, published under their content hash with immutable caching
+headers, and adds progressive streaming of narration and of answers that
+are still being written.
+
+Clips live in the shared audio cache, so any worker process can serve a clip
+published by another. Configuration:
+
+- URDU_AUDIO_SERVER       "on" starts the endpoint; off by default
+- URDU_AUDIO_BASE_URL     URL the browser reaches it at, e.g. when it sits
+                          behind the same reverse proxy as the app (default
+                          http://localhost:<port>, for a browser on this machine)
+- URDU_AUDIO_HOST / URDU_AUDIO_PORT   bind address (default 127.0.0.1:8765)
+- URDU_AUDIO_SECRET       key for signing narration stream URLs (generated
+                          and kept in the shared cache directory if unset)
+
+Long narration is served from /stream/ URLs: the handler synthesizes the
+chunks concurrently and writes MP3 frames as soon as each chunk is ready, so
+the browser starts playing the first sentence while the rest is rendered.
+Stream URLs carry their chunk list, signed, so any worker can serve them.
+
+Live streams (/live/) are fed while the text is still being produced, e.g.
+sentence by sentence as an LLM answer streams in. They are held in memory,
+so only the process that owns the endpoint can open one.
+
+/metrics serves the owning worker's turn and run metrics (tutor_metrics);
+every worker also serves its own on the metrics port. /health identifies
+the endpoint to other workers that find its port taken.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from audio_cache import get_audio_cache
+from audio_sequence import (
+    iter_stitched_mp3,
+    split_for_tts,
+    stitch_mp3_cached,
+    submit_synthesis,
+    synthesis_result,
+)
+from tts_engines import get_tts_chain
+
+AUDIO_HOST = os.getenv("URDU_AUDIO_HOST", "127.0.0.1")
+AUDIO_PORT = int(os.getenv("URDU_AUDIO_PORT", "8765"))
+AUDIO_SERVER_ENABLED = os.getenv("URDU_AUDIO_SERVER", "off").lower() in ("1", "on", "true", "yes")
+AUDIO_BASE_URL = (os.getenv("URDU_AUDIO_BASE_URL") or f"http://localhost:{AUDIO_PORT}").rstrip("/")
+
+_CONTENT_KEY_PREFIX = "content-"
+_PATH_RE = re.compile(r"^/audio/([0-9a-f]{64})\.mp3$")
+_STREAM_PATH_RE = re.compile(r"^/stream/([A-Za-z0-9_-]{1,8192})\.([0-9a-f]{32})\.mp3$")
+_LIVE_PATH_RE = re.compile(r"^/live/([A-Za-z0-9_-]{16,64})\.mp3$")
+NARRATION_GAP_MS = 150
+MAX_STREAM_CHUNKS = 64
+LIVE_STREAM_IDLE_SECONDS = 60
+LIVE_STREAM_FINISH_SECONDS = 5
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+# What /health answers, so a worker can tell a sibling's endpoint on the port
+# from anything else listening there
+_HEALTH_MARKER = b"urdu-audio-server ok\n"
+
+
+def _content_type(data):
+    # Local engines without an MP3 encoder hand back WAV; the opus profile is Ogg
+    if data[:4] == b"RIFF":
+        return "audio/wav"
+    if data[:4] == b"OggS":
+        return "audio/ogg"
+    return "audio/mpeg"
+
+
+class _AudioRequestHandler(BaseHTTPRequestHandler):
+    """Serves /audio/<sha256>.mp3 with immutable caching and byte ranges."""
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/health":
+            self._serve_health()
+        elif path == "/metrics":
+            self._serve_metrics()
+        elif self.path.startswith("/stream/"):
+            self._serve_stream()
+        elif self.path.startswith("/live/"):
+            self._serve_live()
+        else:
+            self._serve(send_body=True)
+
+    def _serve_health(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(_HEALTH_MARKER)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(_HEALTH_MARKER)
+
+    def _serve_metrics(self):
+        from tutor_metrics import render_metrics
+
+        body = render_metrics().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _serve_live(self):
+        match = _LIVE_PATH_RE.match(self.path.split("?", 1)[0])
+        stream = _claim_live_stream(match.group(1)) if match else None
+        if stream is None:
+            self.send_error(404)
+            return
+        written = 0
+        try:
+            written = self._write_stream(stream.clips(), stream.gap_ms)
+        finally:
+            stream.finished(written)
+
+    def _serve_stream(self):
+        match = _STREAM_PATH_RE.match(self.path.split("?", 1)[0])
+        job = _decode_stream_token(match.group(1), match.group(2)) if match else None
+        if job is None:
+            self.send_error(404)
+            return
+
+        chain = get_tts_chain()
+        # Submit every chunk up front; frames go out in order as each finishes
+        futures = [submit_synthesis(chain.synthesize, chunk, job["lang"]) for chunk in job["chunks"]]
+
+        def clips():
+            for future in futures:
+                yield synthesis_result(future)
+
+        # Clips that can't be stitched (e.g. WAV from a local engine): one plain clip
+        self._write_stream(clips(), job["gap_ms"],
+                           fallback=lambda: chain.synthesize(" ".join(job["chunks"]), job["lang"]))
+
+    def _write_stream(self, clips, gap_ms, fallback=None):
+        """Stream the stitched clips; returns the audio bytes written.
+
+        Headers wait for the first MP3 block, so when no clip is MP3 the
+        response can still be `fallback()`'s audio (or 204 if there is none).
+        """
+        written = 0
+        try:
+            for block in iter_stitched_mp3(clips, gap_ms=gap_ms):
+                if not written:
+                    self._send_stream_headers("audio/mpeg")
+                self.wfile.write(block)
+                self.wfile.flush()
+                written += len(block)
+            if not written:
+                audio = fallback() if fallback else b""
+                if not audio:
+                    self.send_response(204)
+                    self.send_header("Access-Control-Allow-Origin", "*")
+                    self.end_headers()
+                    return 0
+                self._send_stream_headers(_content_type(audio), len(audio))
+                self.wfile.write(audio)
+                written = len(audio)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # listener navigated away
+        return written
+
+    def _send_stream_headers(self, content_type, length=None):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        if length is not None:
+            self.send_header("Content-Length", str(length))
+        # The body depends on which chunks synthesized; don't let a partial
+        # stream stick in the browser cache. Replays use the stitched URL.
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+
+    def _serve(self, send_body):
+        match = _PATH_RE.match(self.path.split("?", 1)[0])
+        data = get_audio_cache().get(_CONTENT_KEY_PREFIX + match.group(1)) if match else None
+        if data is None:
+            self.send_error(404)
+            return
+
+        etag = f'"{match.group(1)}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self._send_cache_headers(etag)
+            self.end_headers()
+            return
+
+        # Safari insists on range support before it will play <audio>
+        start, end = 0, len(data) - 1
+        range_match = _RANGE_RE.match(self.headers.get("Range", ""))
+        if range_match and (range_match.group(1) or range_match.group(2)):
+            if range_match.group(1):
+                start = int(range_match.group(1))
+                if range_match.group(2):
+                    end = min(int(range_match.group(2)), end)
+            else:
+                start = max(len(data) - int(range_match.group(2)), 0)
+            if start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(data)}")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        else:
+            self.send_response(200)
+
+        body = data[start:end + 1]
+        self.send_header("Content-Type", _content_type(data))
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Accept-Ranges", "bytes")
+        self._send_cache_headers(etag)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _send_cache_headers(self, etag):
+        self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+        self.send_header("ETag", etag)
+        self.send_header("Access-Control-Allow-Origin", "*")
+
+    def log_message(self, format, *args):
+        # Keep Streamlit's console readable
+        pass
+
+
+_server = None
+_server_ready = None
+_server_lock = threading.Lock()
+
+
+def _sibling_serves_port() -> bool:
+    """Whether the process holding the port is another worker's audio endpoint."""
+    probe_host = "127.0.0.1" if AUDIO_HOST in ("0.0.0.0", "") else AUDIO_HOST
+    try:
+        with urllib.request.urlopen(f"http://{probe_host}:{AUDIO_PORT}/health", timeout=2) as response:
+            return response.status == 200 and response.read(64) == _HEALTH_MARKER
+    except (OSError, ValueError):
+        return False
+
+
+def ensure_audio_server() -> bool:
+    """Start the audio endpoint once per process. Returns False if URLs can't be served."""
+    global _server, _server_ready
+    if not AUDIO_SERVER_ENABLED:
+        return False
+    with _server_lock:
+        if _server_ready is not None:
+            return _server_ready
+        try:
+            _server = ThreadingHTTPServer((AUDIO_HOST, AUDIO_PORT), _AudioRequestHandler)
+        except OSError:
+            # Another worker process may own the port; it reads the same
+            # shared cache directory, so its URLs serve our clips too. Anything
+            # else on the port would 404 every clip, so play them in the page then.
+            _server_ready = _sibling_serves_port()
+            return _server_ready
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="audio-server", daemon=True).start()
+        _server_ready = True
+        return True
+
+
+def store_audio(audio_bytes: bytes) -> str:
+    """Store a clip under its content hash in the shared cache; returns the hash."""
+    digest = hashlib.sha256(audio_bytes).hexdigest()
+    cache = get_audio_cache()
+    key = _CONTENT_KEY_PREFIX + digest
+    if cache.get(key) is None:
+        cache.put(key, audio_bytes)
+    return digest
+
+
+def load_audio(digest: str):
+    """Clip stored by store_audio(), or None if it has been evicted."""
+    return get_audio_cache().get(_CONTENT_KEY_PREFIX + digest) if digest else None
+
+
+def publish_audio(audio_bytes: bytes) -> str:
+    """Store a clip under its content hash and return its immutable URL."""
+    return f"{AUDIO_BASE_URL}/audio/{store_audio(audio_bytes)}.mp3"
+
+
+class LiveAudioStream:
+    """A progressive MP3 stream fed one clip (or clip future) at a time."""
+
+    def __init__(self, gap_ms=NARRATION_GAP_MS):
+        self.id = secrets.token_urlsafe(18)
+        self.url = f"{AUDIO_BASE_URL}/live/{self.id}.mp3"
+        self.gap_ms = gap_ms
+        self.created = time.monotonic()
+        self.bytes_written = 0
+        self._queue = queue.Queue()
+        self._claimed = threading.Event()
+        self._finished = threading.Event()
+
+    def add(self, clip_or_future):
+        """Queue audio bytes or a Future resolving to them; played in order."""
+        self._queue.put(clip_or_future)
+
+    def close(self):
+        self._queue.put(None)
+
+    def claim(self):
+        self._claimed.set()
+        return self
+
+    def finished(self, bytes_written):
+        self.bytes_written = bytes_written
+        self._finished.set()
+
+    def played(self, timeout=LIVE_STREAM_FINISH_SECONDS) -> bool:
+        """Whether the browser got any audio from this stream.
+
+        Waits (up to `timeout`) for a stream the browser opened to finish; a
+        stream it never opened, or one whose clips weren't MP3, played nothing.
+        """
+        if not self._claimed.is_set():
+            return False
+        self._finished.wait(timeout)
+        return self.bytes_written > 0
+
+    def clips(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=LIVE_STREAM_IDLE_SECONDS)
+            except queue.Empty:
+                return
+            if item is None:
+                return
+            yield synthesis_result(item) if hasattr(item, "result") else item
+
+
+_live_streams = {}
+_live_streams_lock = threading.Lock()
+
+
+def open_live_stream(gap_ms=NARRATION_GAP_MS):
+    """Register a live stream, or return None if this process doesn't serve audio."""
+    if not ensure_audio_server() or _server is None:
+        return None
+    stream = LiveAudioStream(gap_ms=gap_ms)
+    with _live_streams_lock:
+        # Forget streams the browser never fetched
+        cutoff = time.monotonic() - LIVE_STREAM_IDLE_SECONDS * 5
+        for stale_id in [sid for sid, s in _live_streams.items() if s.created < cutoff]:
+            del _live_streams[stale_id]
+        _live_streams[stream.id] = stream
+    return stream
+
+
+def _claim_live_stream(stream_id):
+    with _live_streams_lock:
+        stream = _live_streams.pop(stream_id, None)
+    return stream.claim() if stream else None
+
+
+_stream_secret = None
+
+
+def _get_stream_secret():
+    """Signing key shared by every worker: from the env, else a file in the cache dir."""
+    global _stream_secret
+    if _stream_secret is not None:
+        return _stream_secret
+    secret = os.getenv("URDU_AUDIO_SECRET", "")
+    if not secret:
+        try:
+            secret = _shared_key_file(os.path.join(get_audio_cache().cache_dir, "stream.key"))
+        except OSError:
+            secret = ""
+        if not secret:
+            # Stream URLs then only work on this worker, but never sign with an empty key
+            secret = secrets.token_hex(32)
+    _stream_secret = secret.encode()
+    return _stream_secret
+
+
+def _shared_key_file(path, attempts=20):
+    """Read the key at `path`, creating it first if no worker has yet."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if not os.path.exists(path):
+        # Write the key in full under a private name, then link it into place:
+        # the first worker's link wins and nobody ever sees a partial file
+        temp = f"{path}.{os.getpid()}.{secrets.token_hex(4)}"
+        fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(32))
+        try:
+            os.link(temp, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(temp)
+    for _ in range(attempts):
+        # A key file left half-written by an older version reads empty
+        with open(path) as f:
+            secret = f.read().strip()
+        if secret:
+            return secret
+        time.sleep(0.05)
+    return ""
+
+
+def _sign(payload):
+    return hmac.new(_get_stream_secret(), payload.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def _encode_stream_token(chunks, lang, gap_ms):
+    job = json.dumps({"c": chunks, "l": lang, "g": gap_ms}, ensure_ascii=False, separators=(",", ":"))
+    payload = base64.urlsafe_b64encode(job.encode("utf-8")).decode("ascii").rstrip("=")
+    return f"{payload}.{_sign(payload)}"
+
+
+def _decode_stream_token(payload, signature):
+    if not hmac.compare_digest(_sign(payload), signature):
+        return None
+    try:
+        job = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        chunks = [str(chunk) for chunk in job["c"]][:MAX_STREAM_CHUNKS]
+        return {"chunks": chunks, "lang": str(job["l"]), "gap_ms": int(job["g"])}
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def narration_src(text: str, lang: str = "ur", gap_ms: int = NARRATION_GAP_MS) -> str:
+    """URL for long narration that starts playing before it is fully synthesized.
+
+    Once every chunk is cached the narration is stitched into one immutable
+    clip; until then it is served as a progressive stream. Returns "" when
+    the endpoint isn't running.
+    """
+    chain = get_tts_chain()
+    chunks = split_for_tts(text)
+    if not chunks or not ensure_audio_server():
+        return ""
+    cached = [chain.lookup(chunk, lang) for chunk in chunks]
+    if not all(cached):
+        return f"{AUDIO_BASE_URL}/stream/{_encode_stream_token(chunks, lang, gap_ms)}.mp3"
+    # Clips that can't be stitched (e.g. WAV from a local engine): one plain clip
+    audio = stitch_mp3_cached(cached, gap_ms=gap_ms) or chain.synthesize(text, lang)
+    return publish_audio(audio) if audio else ""
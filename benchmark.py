@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+End-to-end latency benchmark for tutor-bot turns.
+
+Drives full turns the way urdu_tutor_bot.py does (recorded voice ->
+Whisper transcript -> streamed LLM reply -> sentence-by-sentence TTS) at a
+configurable concurrency and reports p50/p95/p99 for:
+
+- ttft:        turn start to the first LLM token (includes transcription)
+- first_audio: turn start to the first sentence clip being ready to play
+- total:       turn start to the last clip being ready
+
+By default it runs against mock_services.py started in-process, so results
+are reproducible offline; pass --base-url to use an already running stand-in.
+
+Usage:
+    python benchmark.py [--turns 50] [--concurrency 8] [--llm-latency 400] [--json]
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+from mock_services import DEFAULT_PORT, add_config_arguments, config_from_args, start_mock_services
+
+METRICS = ("ttft", "first_audio", "total")
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of `values` (p in 0-100)."""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def synthetic_recording(seconds=3.0, rate=44100):
+    """A recorder-style 44.1 kHz WAV: silence, a voiced tone, silence."""
+    import numpy as np
+
+    t = np.arange(int(seconds * rate)) / rate
+    voiced = (t > seconds * 0.2) & (t < seconds * 0.8)
+    samples = np.where(voiced, 0.3 * np.sin(2 * np.pi * 220 * t), 0.0)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes((samples * 32767).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def run_turn(recording):
+    """One voice turn; returns {metric: seconds}."""
+    from audio_sequence import SentenceBuffer, submit_synthesis
+    from outbound import current_session, get_scheduler
+    from speech_input import prepare_for_whisper
+    from tts_engines import get_tts_chain
+    from tutor_clients import get_chat_llm, get_openai_client, get_tutor_prompt
+    from tutor_memory import LessonMemory
+
+    # Each turn stands in for its own session in the scheduler's fair queues
+    current_session.set(f"turn-{threading.get_ident()}-{time.perf_counter_ns()}")
+    scheduler = get_scheduler()
+    started = time.perf_counter()
+    transcript = scheduler.call(
+        "whisper", get_openai_client().audio.transcriptions.create,
+        model="whisper-1", file=prepare_for_whisper(recording), language="ur",
+    ).text
+    memory = LessonMemory()
+    messages = get_tutor_prompt().format_messages(
+        history=memory.load_memory_variables({})["history"], input=transcript
+    )
+
+    chain = get_tts_chain()
+    sentences = SentenceBuffer()
+    futures = []
+    clip_ready = []
+    ready_lock = threading.Lock()
+
+    def on_clip(future):
+        with ready_lock:
+            clip_ready.append(time.perf_counter())
+
+    def speak(sentence):
+        future = submit_synthesis(chain.synthesize, sentence, "ur")
+        future.add_done_callback(on_clip)
+        futures.append(future)
+
+    first_token = None
+    for chunk in scheduler.stream("llm", lambda: get_chat_llm().stream(messages)):
+        if first_token is None and chunk.content:
+            first_token = time.perf_counter()
+        for sentence in sentences.feed(chunk.content):
+            speak(sentence)
+    for sentence in sentences.flush():
+        speak(sentence)
+    clips = [future.result() for future in futures]
+    if not clips or not all(clips):
+        raise RuntimeError("TTS returned no audio")
+    finished = time.perf_counter()
+    return {
+        "ttft": (first_token or finished) - started,
+        # The first sentence clip is the one that starts playing
+        "first_audio": min(clip_ready) - started if clip_ready else finished - started,
+        "total": finished - started,
+    }
+
+
+def run_benchmark(turns, concurrency, recording):
+    results, errors = [], []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(run_turn, recording) for _ in range(turns)]
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as exc:
+                errors.append(str(exc))
+    elapsed = time.perf_counter() - started
+    summary = {
+        "turns": turns,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "elapsed_s": elapsed,
+        "turns_per_s": len(results) / elapsed if elapsed else 0.0,
+    }
+    for metric in METRICS:
+        values = [result[metric] * 1000 for result in results]
+        summary[metric] = {
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99),
+            "mean_ms": sum(values) / len(values) if values else float("nan"),
+        }
+    from outbound import get_scheduler
+
+    summary["outbound"] = get_scheduler().stats()
+    summary["error_samples"] = errors[:5]
+    return summary
+
+
+def print_summary(summary):
+    print(
+        f"{summary['turns']} turns at concurrency {summary['concurrency']}: "
+        f"{summary['errors']} errors, {summary['turns_per_s']:.2f} turns/s"
+    )
+    print(f"{'metric':<12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for metric in METRICS:
+        row = summary[metric]
+        print(f"{metric:<12}{row['p50_ms']:>10.0f}{row['p95_ms']:>10.0f}{row['p99_ms']:>10.0f}{row['mean_ms']:>10.0f}")
+    for name, provider in summary["outbound"].items():
+        print(
+            f"outbound {name}: {provider['calls']} calls, {provider['retries']} retries, "
+            f"{provider['failures']} failures, p95 queue wait {provider['wait_p95_ms'] or 0:.0f} ms"
+        )
+    for error in summary["error_samples"]:
+        print(f"error: {error}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end latency benchmark for tutor-bot turns.")
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--base-url", help="use a running mock_services.py instead of starting one")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port for the in-process stand-in")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    if args.base_url:
+        base_url = args.base_url.rstrip("/")
+    else:
+        start_mock_services(config_from_args(args), port=args.port)
+        base_url = f"http://127.0.0.1:{args.port}"
+    # Configure the clients before they are first built; a throwaway audio
+    # cache keeps every turn a cold TTS miss
+    os.environ["OPENAI_BASE_URL"] = f"{base_url}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "mock")
+    os.environ["URDU_GTTS_BASE_URL"] = base_url
+    os.environ["URDU_TTS_ENGINES"] = "gtts"
+    os.environ["URDU_AUDIO_CACHE_DIR"] = tempfile.mkdtemp(prefix="urdu-bench-")
+
+    summary = run_benchmark(args.turns, args.concurrency, synthetic_recording())
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary)
+
+
+if __name__ == "__main__":
+    main()
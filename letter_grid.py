@@ -0,0 +1,65 @@
+"""
+Letter-card grid for the Urdu Alphabet Adventure's letters page.
+
+The grid used to be 38 markdown cards plus 38 "Learn" buttons laid out in
+st.columns, all rebuilt and re-sent on every rerun. It is now one custom
+component (frontend/letter_grid): the card HTML is built once per set of
+learned letters and cached, clicks are handled in the browser, and the
+clicked letter comes back as the component's value. Showing the letters
+page costs one element instead of a few hundred.
+"""
+
+import functools
+import os
+
+from streamlit.components.v1 import declare_component
+
+from urdu_alphabet_data import URDU_ALPHABET_DATA
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "letter_grid")
+COLUMNS = 5
+
+_letter_grid = declare_component("letter_grid", path=FRONTEND_DIR)
+
+
+def create_letter_card(letter_data, is_learned=False):
+    """Create a beautiful letter card"""
+    status_emoji = "✅" if is_learned else "📚"
+
+    card_html = f"""
+    <div style="
+        background: linear-gradient(135deg, {letter_data['color']}20, {letter_data['color']}40);
+        border: 3px solid {letter_data['color']};
+        border-radius: 20px;
+        padding: 20px;
+        text-align: center;
+        margin: 10px;
+        box-shadow: 0 4px 8px rgba(0,0,0,0.1);
+        transform: scale(1);
+        transition: transform 0.3s;
+    ">
+        <div style="font-size: 4em; margin-bottom: 10px;">{letter_data['letter']}</div>
+        <div style="font-size: 1.5em; font-weight: bold; margin-bottom: 5px;">{letter_data['name']}</div>
+        <div style="font-size: 1.2em; color: #666; margin-bottom: 10px;">"{letter_data['sound']}"</div>
+        <div style="font-size: 1.5em;">{status_emoji}</div>
+    </div>
+    """
+    return card_html
+
+
+@functools.lru_cache(maxsize=128)
+def grid_html(learned: frozenset) -> str:
+    """Cards for every letter, each a button carrying its letter id."""
+    cards = []
+    for letter in URDU_ALPHABET_DATA["letters"]:
+        cards.append(
+            f'<button class="letter" data-id="{letter["id"]}" title="{letter["name"]}">'
+            f'{create_letter_card(letter, letter["id"] in learned)}'
+            f'<span class="learn">سیکھیں (Learn)</span></button>'
+        )
+    return f'<div class="grid" style="grid-template-columns: repeat({COLUMNS}, 1fr);">{"".join(cards)}</div>'
+
+
+def letter_grid(learned_letters, key="letter_grid"):
+    """Show the grid; returns the click as {"id": letter_id, "at": ms}, or None."""
+    return _letter_grid(html=grid_html(frozenset(learned_letters)), key=key, default=None)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI and gTTS endpoints the tutor bot calls.
+
+Emulates streaming chat completions, Whisper transcription and the Google
+Translate TTS endpoint gTTS uses, each with configurable latency, jitter
+and error rate, so the bot and benchmark.py can be load-tested offline.
+
+Usage:
+    python mock_services.py [--port 8790] [--llm-latency 400] [--error-rate 0.01]
+
+Point the bot at it with:
+    OPENAI_BASE_URL=http://127.0.0.1:8790/v1
+    URDU_GTTS_BASE_URL=http://127.0.0.1:8790
+"""
+
+import argparse
+import base64
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+DEFAULT_PORT = 8790
+# Open-ended questions, so a benchmark turn always takes the LLM path
+TRANSCRIPTS = ["مجھے کہانی سناؤ", "بلی کیسے بولتی ہے؟", "مجھے پھل کے بارے میں بتاؤ"]
+ANSWERS = [
+    "واہ! ب سے بلی، بلی میاؤں میاؤں کرتی ہے! کیا تم پ سیکھو گے؟",
+    "ا سے آم، آم بہت میٹھا ہے! چلو اب ب سیکھیں؟",
+    "آؤ، حروف سیکھیں! ت سے تتلی، تتلی اڑتی ہے۔ کیا تم اڑنا چاہو گے؟",
+]
+_SENTENCE_RE = re.compile(r"[^!?۔؟]+[!?۔؟]*")
+# MPEG-2 Layer III, 32 kbit/s, 24 kHz mono: the format gTTS returns
+MP3_FRAME_HEADER = b"\xff\xf3\x44\xc0"
+FRAME_SECONDS = 576 / 24000
+SPEECH_SECONDS_PER_CHAR = 0.06
+
+
+class MockConfig:
+    """Latencies in milliseconds; jitter is a +/- fraction of each latency."""
+
+    def __init__(self, llm_latency=400, token_interval=30, whisper_latency=600, tts_latency=250,
+                 jitter=0.2, error_rate=0.0):
+        self.llm_latency = llm_latency
+        self.token_interval = token_interval
+        self.whisper_latency = whisper_latency
+        self.tts_latency = tts_latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._serial = itertools.count(1)
+
+    def delay(self, ms):
+        if ms > 0:
+            time.sleep(ms * random.uniform(1 - self.jitter, 1 + self.jitter) / 1000)
+
+    def should_fail(self):
+        return random.random() < self.error_rate
+
+    def next_serial(self):
+        return next(self._serial)
+
+
+def _mp3_for(text):
+    # Imported here so importing this module doesn't open the audio cache
+    # before benchmark.py has pointed it at a scratch directory
+    from audio_sequence import _silent_frame
+
+    frames = max(1, int(len(text) * SPEECH_SECONDS_PER_CHAR / FRAME_SECONDS))
+    return _silent_frame(MP3_FRAME_HEADER) * frames
+
+
+def _tokens(text):
+    # Word-sized pieces with their trailing space, like a chat model's deltas
+    words = text.split(" ")
+    return [word + " " for word in words[:-1]] + [words[-1]]
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = MockConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _send(self, status, body, content_type="application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self):
+        error = {"error": {"message": "mock upstream error", "type": "server_error"}}
+        self._send(503, json.dumps(error).encode())
+
+    def do_POST(self):
+        body = self._read_body()
+        if self.config.should_fail():
+            self._send_error()
+        elif self.path.endswith("/chat/completions"):
+            self._chat(json.loads(body or b"{}"))
+        elif self.path.endswith("/audio/transcriptions"):
+            self.config.delay(self.config.whisper_latency)
+            self._send(200, json.dumps({"text": random.choice(TRANSCRIPTS)}).encode())
+        elif self.path.endswith("/data/batchexecute"):
+            self._tts(body)
+        else:
+            self._send(404, b'{"error": {"message": "not found"}}')
+
+    def _chat(self, request):
+        serial = self.config.next_serial()
+        # Tagging every sentence with the serial keeps each TTS clip, not just
+        # the last, unique across turns, so none is served from cache
+        answer = " ".join(f"({serial}) {sentence.strip()}"
+                          for sentence in _SENTENCE_RE.findall(ANSWERS[serial % len(ANSWERS)]))
+        model = request.get("model", "mock")
+        self.config.delay(self.config.llm_latency)
+        if not request.get("stream"):
+            response = {
+                "id": f"chatcmpl-{serial}", "object": "chat.completion", "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": answer},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            }
+            self._send(200, json.dumps(response, ensure_ascii=False).encode())
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(delta, finish_reason=None):
+            chunk = {
+                "id": f"chatcmpl-{serial}", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+            self.wfile.flush()
+
+        try:
+            event({"role": "assistant", "content": ""})
+            for i, token in enumerate(_tokens(answer)):
+                if i:
+                    self.config.delay(self.config.token_interval)
+                event({"content": token})
+            event({}, finish_reason="stop")
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _tts(self, body):
+        try:
+            freq = json.loads(parse_qs(body.decode())["f.req"][0])
+            text = json.loads(freq[0][0][1])[0]
+        except (KeyError, IndexError, ValueError):
+            text = ""
+        self.config.delay(self.config.tts_latency)
+        audio = base64.b64encode(_mp3_for(text)).decode()
+        # Compact separators, as the real endpoint (and gTTS's parser) expects
+        payload = json.dumps([["wrb.fr", "jQ1olc", f'["{audio}"]', None, None, None, "generic"]],
+                             separators=(",", ":"))
+        self._send(200, f")]}}'\n\n{len(payload)}\n{payload}\n".encode(), "application/json; charset=utf-8")
+
+
+def start_mock_services(config=None, host="127.0.0.1", port=DEFAULT_PORT):
+    """Serve the mock endpoints from a daemon thread; returns the server."""
+    handler = type("MockHandler", (_MockHandler,), {"config": config or MockConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-services", daemon=True).start()
+    return server
+
+
+def add_config_arguments(parser):
+    parser.add_argument("--llm-latency", type=float, default=400, help="ms before the first token")
+    parser.add_argument("--token-interval", type=float, default=30, help="ms between tokens")
+    parser.add_argument("--whisper-latency", type=float, default=600, help="ms per transcription")
+    parser.add_argument("--tts-latency", type=float, default=250, help="ms per TTS request")
+    parser.add_argument("--jitter", type=float, default=0.2, help="+/- fraction applied to every latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 503")
+
+
+def config_from_args(args):
+    return MockConfig(
+        llm_latency=args.llm_latency,
+        token_interval=args.token_interval,
+        whisper_latency=args.whisper_latency,
+        tts_latency=args.tts_latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI and gTTS endpoints.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    server = start_mock_services(config_from_args(args), args.host, args.port)
+    print(f"Mock services on http://{args.host}:{args.port} (OPENAI_BASE_URL=http://{args.host}:{args.port}/v1)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+Shared scheduler for outbound API calls (OpenAI chat and Whisper, TTS).
+
+Every session used to call the providers directly, so a spike of children
+meant a spike of concurrent requests, 429s and cascading failures. All
+outbound calls now go through one process-wide scheduler that gives each
+provider:
+
+- a concurrency cap, with waiting calls served round-robin per session so
+  one busy session can't starve the others
+- a token bucket limiting the request rate
+- jittered exponential retry of 429s, 5xx and connection errors, honouring
+  Retry-After when the provider sends it
+
+A call can carry a deadline covering its queueing, rate-limit waits, attempts
+and backoff, so callers with a fallback (the TTS chain) aren't held up.
+
+Queue depth, wait times, retries and rate-limit hits are kept per provider.
+The session a call belongs to is taken from `current_session`, a context
+variable the app sets once per run (submit_synthesis carries it into the
+TTS pool).
+
+Configuration:
+- URDU_OUTBOUND_LIMITS  per provider "name=concurrency:requests_per_second",
+                        e.g. "llm=8:5,whisper=4:2,gtts=6:10"
+- URDU_OUTBOUND_RETRIES per provider retry count, e.g. "llm=3,gtts=1"
+"""
+
+import contextvars
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Session the current call belongs to; used for per-session fairness
+current_session = contextvars.ContextVar("current_session", default="")
+
+DEFAULT_LIMITS = {
+    "llm": (8, 5.0),
+    "whisper": (4, 2.0),
+    "gtts": (6, 10.0),
+    "espeak": (2, 0.0),
+}
+DEFAULT_RETRIES = {"llm": 3, "whisper": 2, "gtts": 1, "espeak": 0}
+FALLBACK_LIMITS = (4, 0.0)
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 8.0
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def _status_of(exc):
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status
+
+
+def is_retryable(exc) -> bool:
+    """429s, 5xx, timeouts and connection failures are worth retrying."""
+    status = _status_of(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    # openai.APIConnectionError / APITimeoutError, requests.ConnectionError / Timeout
+    name = type(exc).__name__
+    return "Timeout" in name or "Connection" in name
+
+
+def _retry_after(exc):
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Blocking token bucket; a rate of 0 means unlimited."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, deadline=None):
+        """Block until a token is available; returns the seconds waited.
+
+        Raises TimeoutError if no token frees up before `deadline` (monotonic).
+        """
+        if not self.rate:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            if deadline is not None and now + delay > deadline:
+                raise TimeoutError("rate limit wait exceeds the call's deadline")
+            time.sleep(delay)
+            waited += delay
+
+
+class _Ticket:
+    __slots__ = ("granted",)
+
+    def __init__(self):
+        self.granted = False
+
+
+class _Provider:
+    def __init__(self, name, concurrency, rate, retries):
+        self.name = name
+        self.concurrency = concurrency
+        self.retries = retries
+        self.bucket = TokenBucket(rate)
+        self.cond = threading.Condition()
+        self.active = 0
+        self.depth = 0
+        self.waiting = OrderedDict()  # session -> deque of tickets, in round-robin order
+        self.waits_ms = deque(maxlen=500)
+        self.counters = {"calls": 0, "retries": 0, "rate_limited": 0, "failures": 0}
+
+    def grant(self):
+        # Callers hold cond. Hand free slots to the session at the head of the
+        # rotation, then move that session to the back.
+        granted = False
+        while self.active < self.concurrency and self.waiting:
+            session, tickets = self.waiting.popitem(last=False)
+            tickets.popleft().granted = True
+            if tickets:
+                self.waiting[session] = tickets
+            self.active += 1
+            self.depth -= 1
+            granted = True
+        if granted:
+            self.cond.notify_all()
+
+
+class OutboundScheduler:
+    """Per-provider concurrency caps, rate limits, retries and fair queueing."""
+
+    def __init__(self, limits=None, retries=None):
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.retries = dict(DEFAULT_RETRIES, **(retries or {}))
+        self._providers = {}
+        self._lock = threading.Lock()
+
+    def _provider(self, name):
+        with self._lock:
+            if name not in self._providers:
+                concurrency, rate = self.limits.get(name, FALLBACK_LIMITS)
+                self._providers[name] = _Provider(name, concurrency, rate, self.retries.get(name, 1))
+            return self._providers[name]
+
+    def _acquire(self, provider, deadline=None):
+        started = time.perf_counter()
+        ticket = _Ticket()
+        session = current_session.get()
+        with provider.cond:
+            provider.waiting.setdefault(session, deque()).append(ticket)
+            provider.depth += 1
+            provider.grant()
+            while not ticket.granted:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._abandon(provider, session, ticket)
+                    raise TimeoutError(f"{provider.name}: no free slot before the call's deadline")
+                provider.cond.wait(remaining)
+        try:
+            provider.bucket.take(deadline)
+        except TimeoutError:
+            with provider.cond:
+                provider.counters["failures"] += 1
+            self._release(provider)
+            raise
+        with provider.cond:
+            provider.waits_ms.append((time.perf_counter() - started) * 1000)
+            provider.counters["calls"] += 1
+
+    def _abandon(self, provider, session, ticket):
+        # Callers hold cond: take an ungranted ticket back out of the queue
+        provider.counters["failures"] += 1
+        tickets = provider.waiting.get(session)
+        if tickets is not None and ticket in tickets:
+            tickets.remove(ticket)
+            provider.depth -= 1
+            if not tickets:
+                del provider.waiting[session]
+
+    def _release(self, provider):
+        with provider.cond:
+            provider.active -= 1
+            provider.grant()
+
+    def _backoff(self, provider, exc, attempt, retries=None, deadline=None):
+        """Sleep before retry `attempt`, or return False if `exc` shouldn't be retried."""
+        retries = provider.retries if retries is None else retries
+        delay = _retry_after(exc)
+        if delay is None:
+            # Full jitter keeps a burst of failed callers from retrying in lockstep
+            delay = random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempt - 1)))
+        delay = min(delay, RETRY_MAX_SECONDS)
+        if (attempt > retries or not is_retryable(exc)
+                or (deadline is not None and time.monotonic() + delay >= deadline)):
+            with provider.cond:
+                provider.counters["failures"] += 1
+            return False
+        with provider.cond:
+            provider.counters["retries"] += 1
+            provider.counters["rate_limited"] += int(_status_of(exc) == 429)
+        time.sleep(delay)
+        return True
+
+    def call(self, provider_name, fn, *args, deadline=None, retries=None, **kwargs):
+        """Run fn(*args, **kwargs) under `provider_name`'s limits, retrying transient errors.
+
+        `deadline` (time.monotonic()) bounds queueing, attempts and backoff:
+        TimeoutError is raised if no slot frees up in time, and no retry is
+        started that couldn't finish. `retries` overrides the provider's count.
+        """
+        provider = self._provider(provider_name)
+        attempt = 0
+        while True:
+            self._acquire(provider, deadline)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as exc:
+                error = exc
+            finally:
+                self._release(provider)
+            attempt += 1
+            if not self._backoff(provider, error, attempt, retries, deadline):
+                raise error
+
+    def stream(self, provider_name, make_stream):
+        """Iterate make_stream() holding one of the provider's slots.
+
+        Failures before the first chunk are retried; once chunks have been
+        yielded the error is raised, since they can't be taken back.
+        """
+        provider = self._provider(provider_name)
+        attempt = 0
+        while True:
+            started = False
+            self._acquire(provider)
+            try:
+                for chunk in make_stream():
+                    started = True
+                    yield chunk
+                return
+            except Exception as exc:
+                if started:
+                    with provider.cond:
+                        provider.counters["failures"] += 1
+                    raise
+                error = exc
+            finally:
+                self._release(provider)
+            attempt += 1
+            if not self._backoff(provider, error, attempt):
+                raise error
+
+    def stats(self) -> dict:
+        """Per provider: queue depth, active calls, wait times and retry counters."""
+        stats = {}
+        with self._lock:
+            providers = list(self._providers.values())
+        for provider in providers:
+            with provider.cond:
+                waits = sorted(provider.waits_ms)
+                entry = dict(provider.counters)
+                entry.update({
+                    "queue_depth": provider.depth,
+                    "active": provider.active,
+                    "concurrency": provider.concurrency,
+                    "wait_p50_ms": round(waits[len(waits) // 2], 1) if waits else None,
+                    "wait_p95_ms": round(waits[min(int(len(waits) * 0.95), len(waits) - 1)], 1) if waits else None,
+                })
+            stats[provider.name] = entry
+        return stats
+
+
+def _parse_spec(spec, parse_value):
+    parsed = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        try:
+            parsed[name.strip()] = parse_value(value)
+        except ValueError:
+            continue
+    return parsed
+
+
+def _parse_limit(value):
+    concurrency, _, rate = value.partition(":")
+    return int(concurrency), float(rate or 0)
+
+
+_shared_scheduler = None
+_shared_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> OutboundScheduler:
+    """Process-wide scheduler shared by every session."""
+    global _shared_scheduler
+    with _shared_scheduler_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = OutboundScheduler(
+                limits=_parse_spec(os.getenv("URDU_OUTBOUND_LIMITS", ""), _parse_limit),
+                retries=_parse_spec(os.getenv("URDU_OUTBOUND_RETRIES", ""), int),
+            )
+        return _shared_scheduler
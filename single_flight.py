@@ -0,0 +1,134 @@
+"""
+In-flight de-duplication of identical concurrent requests.
+
+When a class starts the same lesson, many sessions ask the same question
+and voice the same text within the same second. With single flight, the
+first caller for a key does the work and identical callers that arrive
+while it is running wait for (or, for streams, replay) the same result
+instead of sending their own request. Nothing is kept after the call
+finishes; caching is left to the audio and response caches.
+"""
+
+import threading
+from concurrent.futures import Future
+
+
+class _Broadcast:
+    """Chunks of one in-flight stream, replayable by late subscribers."""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self._cond = threading.Condition()
+
+    def publish(self, chunk):
+        with self._cond:
+            self.chunks.append(chunk)
+            self._cond.notify_all()
+
+    def finish(self, error=None):
+        with self._cond:
+            if not self.done:
+                self.done = True
+                self.error = error
+                self._cond.notify_all()
+
+    def subscribe(self):
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self.chunks) and not self.done:
+                    self._cond.wait()
+                pending = self.chunks[index:]
+                done, error = self.done, self.error
+            yield from pending
+            index += len(pending)
+            if done and index >= len(self.chunks):
+                if error is not None:
+                    raise error
+                return
+
+
+class SingleFlight:
+    """Run one call per key at a time; concurrent callers share its result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._streams = {}
+        self._counters = {"leaders": 0, "coalesced": 0, "errors": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def do(self, key, fn, *args, **kwargs):
+        """Return fn(*args, **kwargs), shared with identical in-flight calls."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            self._counters["leaders" if leader else "coalesced"] += 1
+        if not leader:
+            return future.result()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as exc:
+            self._count("errors")
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stream(self, key, make_stream):
+        """Iterate make_stream(), sharing its chunks with identical in-flight streams.
+
+        Followers replay every chunk from the start, at the leader's pace.
+        """
+        with self._lock:
+            broadcast = self._streams.get(key)
+            leader = broadcast is None
+            if leader:
+                broadcast = self._streams[key] = _Broadcast()
+            self._counters["leaders" if leader else "coalesced"] += 1
+        if not leader:
+            yield from broadcast.subscribe()
+            return
+        try:
+            for chunk in make_stream():
+                broadcast.publish(chunk)
+                yield chunk
+            broadcast.finish()
+        except Exception as exc:
+            self._count("errors")
+            broadcast.finish(exc)
+            raise
+        finally:
+            with self._lock:
+                self._streams.pop(key, None)
+            # The leader stopped iterating early; don't leave followers waiting
+            broadcast.finish(RuntimeError("shared stream was abandoned"))
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["in_flight"] = len(self._calls) + len(self._streams)
+        return stats
+
+
+_named_flights = {}
+_named_flights_lock = threading.Lock()
+
+
+def get_single_flight(name) -> SingleFlight:
+    """Process-wide SingleFlight for `name` (e.g. "llm"), shared by every session."""
+    with _named_flights_lock:
+        if name not in _named_flights:
+            _named_flights[name] = SingleFlight()
+        return _named_flights[name]
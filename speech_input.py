@@ -0,0 +1,111 @@
+"""
+Shrink recorded voice input before it is uploaded to Whisper.
+
+The recorder hands over a 44.1 kHz WAV. Whisper only needs 16 kHz mono
+speech, so the clip is downmixed, resampled and trimmed of leading/trailing
+silence entirely in memory (no shared temp file, so concurrent sessions
+can't clobber each other). With ffmpeg on PATH it is also encoded as Opus;
+without it a 16 kHz mono 16-bit WAV is sent.
+"""
+
+import io
+import shutil
+import subprocess
+import wave
+
+import numpy as np
+
+TARGET_RATE = 16000
+SILENCE_THRESHOLD_DB = -45
+SILENCE_PAD_SECONDS = 0.15
+FRAME_SECONDS = 0.02
+OPUS_BITRATE = "24k"
+
+
+def _read_wav(data):
+    """Decode PCM WAV bytes to (mono float samples in [-1, 1], sample rate)."""
+    with wave.open(io.BytesIO(data), "rb") as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        rate = wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"unsupported WAV sample width: {width}")
+    if channels > 1:
+        samples = samples[: len(samples) // channels * channels].reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def _resample(samples, rate, target=TARGET_RATE):
+    if rate == target or not len(samples):
+        return samples
+    ratio = rate / target
+    if ratio > 1:
+        # Moving average as a cheap anti-aliasing filter before decimating
+        width = int(np.ceil(ratio))
+        samples = np.convolve(samples, np.ones(width) / width, mode="same")
+    positions = np.arange(0, len(samples) - 1, ratio)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def trim_silence(samples, rate=TARGET_RATE, threshold_db=SILENCE_THRESHOLD_DB, pad=SILENCE_PAD_SECONDS):
+    """Drop leading/trailing frames quieter than `threshold_db` (dBFS), keeping `pad` seconds."""
+    frame = max(1, int(rate * FRAME_SECONDS))
+    count = len(samples) // frame
+    if not count:
+        return samples[:0]
+    rms = np.sqrt(np.mean(samples[: count * frame].reshape(count, frame) ** 2, axis=1))
+    loud = np.nonzero(20 * np.log10(rms + 1e-10) > threshold_db)[0]
+    if not len(loud):
+        return samples[:0]
+    padding = int(rate * pad)
+    start = max(0, loud[0] * frame - padding)
+    end = min(len(samples), (loud[-1] + 1) * frame + padding)
+    return samples[start:end]
+
+
+def _encode_wav(samples, rate=TARGET_RATE):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes((np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def _encode_opus(wav_bytes, ffmpeg, timeout=5.0):
+    command = [ffmpeg, "-loglevel", "error", "-i", "pipe:0", "-c:a", "libopus", "-application", "voip",
+               "-b:a", OPUS_BITRATE, "-f", "ogg", "pipe:1"]
+    try:
+        return subprocess.run(command, input=wav_bytes, capture_output=True, timeout=timeout,
+                              check=True).stdout
+    except (OSError, subprocess.SubprocessError):
+        return b""
+
+
+def prepare_for_whisper(audio_bytes, ffmpeg=None):
+    """Return (filename, bytes) ready for upload, or None if the clip is silent.
+
+    Input that can't be decoded as WAV is passed through unchanged.
+    """
+    try:
+        samples, rate = _read_wav(audio_bytes)
+    except (wave.Error, EOFError, ValueError):
+        return "speech.wav", audio_bytes
+    samples = trim_silence(_resample(samples, rate))
+    if not len(samples):
+        return None
+    wav_bytes = _encode_wav(samples)
+    ffmpeg = ffmpeg if ffmpeg is not None else shutil.which("ffmpeg")
+    if ffmpeg:
+        opus = _encode_opus(wav_bytes, ffmpeg)
+        if opus:
+            return "speech.ogg", opus
+    return "speech.wav", wav_bytes
@@ -0,0 +1,123 @@
+import io
+import wave
+
+from audio_sequence import _confirms_sync, _mp3_frames, _parse_frame_header, stitch_mp3, trim_mp3_silence
+
+# MPEG-2 Layer III, 32 kbps, 24 kHz, mono, no CRC: 96-byte frames of 24 ms (gTTS's format)
+HEADER = bytes([0xFF, 0xF3, 0x44, 0xC4])
+FRAME_LENGTH = 96
+
+
+def loud_frame():
+    # All-ones side info: every granule claims the maximum coded length
+    return HEADER + b"\xff" * (FRAME_LENGTH - 4)
+
+
+def silent_frame():
+    return HEADER + b"\x00" * (FRAME_LENGTH - 4)
+
+
+def mp3(*frames):
+    return b"".join(frames)
+
+
+def wav_clip():
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(16000)
+        out.writeframes(b"\x00\x01" * 1600)
+    return buffer.getvalue()
+
+
+def ogg_clip():
+    # An Ogg page whose payload happens to contain an MP3 frame sync
+    return b"OggS" + b"\x00" * 24 + b"OpusHead" + mp3(loud_frame(), loud_frame())
+
+
+def test_parse_frame_header_reads_length_and_format():
+    header = _parse_frame_header(HEADER, 0)
+    assert header["length"] == FRAME_LENGTH
+    assert header["sample_rate"] == 24000
+    assert header["mono"]
+    assert _parse_frame_header(b"\xff\xf3", 0) is None
+
+
+def test_stitch_joins_whole_frames_with_silence_between():
+    first = mp3(loud_frame(), loud_frame())
+    second = mp3(loud_frame(), loud_frame(), loud_frame())
+    track = stitch_mp3([first, second], gap_ms=96)
+
+    frames, header = _mp3_frames(track)
+    assert header["sample_rate"] == 24000
+    # 2 + 4 frames of silence (96 ms at 24 ms per frame) + 3
+    assert len(track) == 9 * FRAME_LENGTH
+    assert len(frames) == 9
+    assert all(frame == silent_frame() for frame in frames[2:6])
+    assert frames[6] == loud_frame()
+
+
+def test_stitch_drops_id3_tag_and_info_frame():
+    tag = b"ID3\x04\x00\x00\x00\x00\x00\x0a" + b"\x00" * 10
+    info = bytearray(silent_frame())
+    info[4 + 9:4 + 13] = b"Info"  # after mono MPEG-2 side info
+    clip = tag + bytes(info) + mp3(loud_frame(), loud_frame())
+
+    track = stitch_mp3([clip], gap_ms=0)
+
+    assert track == mp3(loud_frame(), loud_frame())
+
+
+def test_false_sync_in_junk_is_skipped():
+    # A frame header in junk is only trusted once the next frame lines up with it
+    junk = b"\x00" + HEADER + b"\x12" * 40
+    clip = junk + mp3(loud_frame(), loud_frame())
+
+    frames, _ = _mp3_frames(clip)
+
+    assert frames == [loud_frame(), loud_frame()]
+    assert not _confirms_sync(clip, 1, _parse_frame_header(clip, 1))
+
+
+def test_confirms_sync_at_end_of_data_and_before_id3v1():
+    clip = mp3(loud_frame())
+    header = _parse_frame_header(clip, 0)
+    assert _confirms_sync(clip, 0, header)
+    assert _confirms_sync(clip + b"TAG" + b"\x00" * 125, 0, header)
+
+
+def test_truncated_last_frame_is_dropped():
+    clip = mp3(loud_frame(), loud_frame())[:-10]
+    frames, _ = _mp3_frames(clip)
+    assert frames == [loud_frame()]
+
+
+def test_stitch_rejects_wav_and_ogg_clips():
+    clip = mp3(loud_frame(), loud_frame())
+    assert stitch_mp3([wav_clip(), clip]) == b""
+    assert stitch_mp3([clip, ogg_clip()]) == b""
+    assert _mp3_frames(ogg_clip()) == ([], None)
+
+
+def test_stitch_rejects_mixed_sample_rates():
+    # Same bitrate at 22.05 kHz
+    other = bytes([0xFF, 0xF3, 0x40, 0xC4])
+    other_frame = other + b"\xff" * (_parse_frame_header(other, 0)["length"] - 4)
+    assert stitch_mp3([mp3(loud_frame(), loud_frame()), other_frame * 2]) == b""
+
+
+def test_trim_keeps_speech_and_a_margin_of_silence():
+    clip = mp3(*[silent_frame()] * 5, loud_frame(), loud_frame(), *[silent_frame()] * 4)
+
+    trimmed = trim_mp3_silence(clip, keep_frames=2)
+
+    assert trimmed == mp3(silent_frame(), silent_frame(), loud_frame(), loud_frame(),
+                          silent_frame(), silent_frame())
+
+
+def test_trim_leaves_other_containers_and_all_silence_alone():
+    wav = wav_clip()
+    assert trim_mp3_silence(wav) == wav
+    quiet = mp3(silent_frame(), silent_frame())
+    assert trim_mp3_silence(quiet) == quiet
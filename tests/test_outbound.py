@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+
+from outbound import OutboundScheduler
+
+
+class _RateLimited(Exception):
+    """A 429 that asks the caller to come back in five seconds."""
+
+    status_code = 429
+
+    def __init__(self):
+        super().__init__("rate limited")
+        self.response = type("Response", (), {"status_code": 429, "headers": {"retry-after": "5"}})()
+
+
+def hold_slot(scheduler, provider):
+    """Occupy the provider's only slot until the returned event is set."""
+    release = threading.Event()
+    holding = threading.Event()
+
+    def work():
+        holding.set()
+        release.wait(5)
+
+    thread = threading.Thread(target=scheduler.call, args=(provider, work))
+    thread.start()
+    assert holding.wait(5)
+    return release, thread
+
+
+def test_queued_call_gives_up_at_its_deadline():
+    scheduler = OutboundScheduler(limits={"tts": (1, 0.0)})
+    release, thread = hold_slot(scheduler, "tts")
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        scheduler.call("tts", lambda: b"late", deadline=time.monotonic() + 0.2)
+    assert time.monotonic() - started < 1.0
+
+    stats = scheduler.stats()["tts"]
+    assert stats["queue_depth"] == 0
+    assert stats["failures"] == 1
+    release.set()
+    thread.join(5)
+
+
+def test_abandoned_ticket_does_not_take_a_slot():
+    scheduler = OutboundScheduler(limits={"tts": (1, 0.0)})
+    release, thread = hold_slot(scheduler, "tts")
+    with pytest.raises(TimeoutError):
+        scheduler.call("tts", lambda: b"late", deadline=time.monotonic() + 0.1)
+    release.set()
+    thread.join(5)
+
+    # The freed slot went to nobody, so the next call runs straight away
+    assert scheduler.stats()["tts"]["active"] == 0
+    assert scheduler.call("tts", lambda: b"ok", deadline=time.monotonic() + 0.5) == b"ok"
+
+
+def test_rate_limit_wait_past_the_deadline_fails_fast_and_frees_the_slot():
+    scheduler = OutboundScheduler(limits={"tts": (2, 1.0)})
+    assert scheduler.call("tts", lambda: b"first") == b"first"
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        scheduler.call("tts", lambda: b"second", deadline=time.monotonic() + 0.2)
+    # Didn't sleep the second it would take for the next token
+    assert time.monotonic() - started < 0.5
+    assert scheduler.stats()["tts"]["active"] == 0
+
+
+def test_no_retry_is_started_that_would_end_past_the_deadline():
+    scheduler = OutboundScheduler(limits={"tts": (1, 0.0)}, retries={"tts": 3})
+    attempts = []
+
+    def fail():
+        attempts.append(time.monotonic())
+        raise _RateLimited()
+
+    with pytest.raises(_RateLimited):
+        scheduler.call("tts", fail, deadline=time.monotonic() + 1.0)
+    assert len(attempts) == 1
+    assert scheduler.stats()["tts"]["failures"] == 1
+
+
+def test_retries_override_skips_retrying():
+    scheduler = OutboundScheduler(limits={"tts": (1, 0.0)}, retries={"tts": 3})
+    attempts = []
+
+    def fail():
+        attempts.append(1)
+        raise ConnectionError("unreachable")
+
+    with pytest.raises(ConnectionError):
+        scheduler.call("tts", fail, retries=0)
+    assert len(attempts) == 1
@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def must_not_run():
+    raise AssertionError("a follower started its own stream")
+
+
+class Follower(threading.Thread):
+    """Consumes flight.stream(key) on its own thread, recording chunks and the error."""
+
+    def __init__(self, flight, key):
+        super().__init__()
+        self.flight = flight
+        self.key = key
+        self.chunks = []
+        self.error = None
+        self.start()
+
+    def run(self):
+        try:
+            for chunk in self.flight.stream(self.key, must_not_run):
+                self.chunks.append(chunk)
+        except Exception as exc:
+            self.error = exc
+
+    def wait_for(self, count):
+        deadline = time.monotonic() + 5
+        while len(self.chunks) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.chunks
+
+
+def test_follower_replays_from_the_start_then_follows_live():
+    flight = SingleFlight()
+    resume = threading.Event()
+
+    def source():
+        yield "a"
+        yield "b"
+        resume.wait(5)
+        yield "c"
+
+    leader = flight.stream("answer", source)
+    assert [next(leader), next(leader)] == ["a", "b"]
+
+    # Joined after two chunks went out: it still gets them, in order
+    follower = Follower(flight, "answer")
+    assert follower.wait_for(2) == ["a", "b"]
+
+    resume.set()
+    assert list(leader) == ["c"]
+    follower.join(5)
+    assert follower.chunks == ["a", "b", "c"]
+    assert follower.error is None
+    assert flight.stats() == {"leaders": 1, "coalesced": 1, "errors": 0, "in_flight": 0}
+
+
+def test_follower_gets_the_leaders_error_after_the_replayed_chunks():
+    flight = SingleFlight()
+    fail = threading.Event()
+
+    def source():
+        yield "a"
+        fail.wait(5)
+        raise ValueError("upstream failed")
+
+    leader = flight.stream("answer", source)
+    assert next(leader) == "a"
+    follower = Follower(flight, "answer")
+    follower.wait_for(1)
+
+    fail.set()
+    with pytest.raises(ValueError):
+        next(leader)
+    follower.join(5)
+    assert follower.chunks == ["a"]
+    assert isinstance(follower.error, ValueError)
+
+
+def test_follower_is_released_when_the_leader_stops_early():
+    flight = SingleFlight()
+
+    def source():
+        yield "a"
+        yield "b"
+
+    leader = flight.stream("answer", source)
+    assert next(leader) == "a"
+    follower = Follower(flight, "answer")
+    follower.wait_for(1)
+
+    leader.close()
+    follower.join(5)
+    assert not follower.is_alive()
+    assert follower.chunks == ["a"]
+    assert isinstance(follower.error, RuntimeError)
+
+
+def test_finished_stream_is_not_replayed_to_later_callers():
+    flight = SingleFlight()
+    runs = []
+
+    def source():
+        runs.append(1)
+        yield "a"
+
+    assert list(flight.stream("answer", source)) == ["a"]
+    assert list(flight.stream("answer", source)) == ["a"]
+    assert len(runs) == 2
+    assert flight.stats()["coalesced"] == 0
@@ -0,0 +1,362 @@
+"""
+Pluggable text-to-speech engines with a priority/fallback chain.
+
+Engines:
+- GTTSEngine:   Google Translate TTS over the network (natural voice)
+- EspeakEngine: espeak-ng running locally on the CPU (works fully offline)
+
+The chain tries engines in priority order, each with its own timeout, and
+keeps per-engine latency stats. An engine that fails several times in a row
+is skipped for a short cooldown, so an outage doesn't cost every request a
+full timeout. Identical concurrent requests are coalesced so only one
+reaches an engine. Clips go through the shared audio cache keyed
+by the engine that produced them, so a fallback voice is never served from
+cache once the preferred engine is reachable again. Fresh clips pass through
+the audio post-processor (silence trim, loudness, compact encoding) before
+they are cached.
+
+Configuration:
+- URDU_TTS_ENGINES   priority order, e.g. "espeak,gtts" for offline classrooms
+                     (default "gtts,espeak")
+- URDU_TTS_TIMEOUTS  per-engine timeouts in seconds, e.g. "gtts=3,espeak=2"
+- URDU_GTTS_POOLED   "on" reuses connections across gTTS requests (relies on
+                     gTTS internals; off by default)
+- URDU_GTTS_BASE_URL send gTTS requests to another host, e.g. mock_services.py
+                     (implies URDU_GTTS_POOLED)
+"""
+
+import base64
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from audio_cache import audio_cache_key, get_audio_cache
+from audio_postprocess import AudioPostProcessor
+from outbound import get_scheduler
+from single_flight import SingleFlight
+
+DEFAULT_ENGINE_ORDER = os.getenv("URDU_TTS_ENGINES", "gtts,espeak")
+DEFAULT_TIMEOUTS = {"gtts": 4.0, "espeak": 3.0}
+FAILURES_BEFORE_COOLDOWN = 3
+COOLDOWN_SECONDS = 30.0
+# Audio payload in a Google Translate TTS batchexecute response line
+_GTTS_AUDIO_RE = re.compile(r'jQ1olc","\[\\"(.*)\\"]')
+
+
+class TTSEngine:
+    """Base class: subclasses turn text into encoded audio bytes."""
+
+    name = ""
+
+    def version(self) -> str:
+        return ""
+
+    def available(self) -> bool:
+        return True
+
+    def synthesize(self, text: str, lang: str, timeout: float) -> bytes:
+        raise NotImplementedError
+
+
+class GTTSEngine(TTSEngine):
+    """gTTS, optionally with its requests sent over one pooled keep-alive session.
+
+    gTTS opens a fresh requests.Session (new TCP + TLS handshake) for every
+    request and offers no way to pass in a session of its own. With
+    URDU_GTTS_POOLED=on, gTTS only builds the requests and the engine's
+    session, shared by all synthesis threads, sends them.
+
+    That path relies on gTTS internals, so it is opt-in; a stand-in host
+    (URDU_GTTS_BASE_URL) also needs it, to redirect the requests. If a gTTS
+    release changes them, the engine falls back to the public write_to_fp()
+    instead of failing.
+    """
+
+    name = "gtts"
+
+    def __init__(self, pool_size=8, base_url=None, pooled=None):
+        self.pool_size = pool_size
+        self.base_url = (base_url or os.getenv("URDU_GTTS_BASE_URL", "")).rstrip("/")
+        if pooled is None:
+            pooled = os.getenv("URDU_GTTS_POOLED", "off").lower() in ("1", "on", "true", "yes")
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._pooled = pooled or bool(self.base_url)
+
+    def version(self):
+        from gtts.version import __version__
+
+        return __version__
+
+    def _get_session(self):
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size))
+                self._session = session
+            return self._session
+
+    def synthesize(self, text, lang, timeout):
+        from gtts import gTTS
+
+        tts = gTTS(text=text, lang=lang, timeout=timeout)
+        if self._pooled:
+            try:
+                return self._synthesize_pooled(tts, timeout)
+            except _GTTSInternalsChanged as exc:
+                # A stand-in host (base_url) must never be swapped for Google
+                if self.base_url:
+                    raise
+                # A missing private API won't come back; an unparsed response
+                # only sends this one clip the public way
+                if isinstance(exc.__cause__, AttributeError):
+                    self._pooled = False
+        buffer = BytesIO()
+        tts.write_to_fp(buffer)
+        return buffer.getvalue()
+
+    def _synthesize_pooled(self, tts, timeout):
+        try:
+            requests = tts._prepare_requests()
+        except AttributeError as exc:
+            raise _GTTSInternalsChanged(str(exc)) from exc
+        session = self._get_session()
+        buffer = BytesIO()
+        for request in requests:
+            if self.base_url:
+                request.url = self.base_url + urlsplit(request.url).path
+            response = session.send(request, timeout=timeout)
+            response.raise_for_status()
+            found = False
+            for line in response.iter_lines(chunk_size=1024):
+                match = _GTTS_AUDIO_RE.search(line.decode("utf-8"))
+                if match:
+                    buffer.write(base64.b64decode(match.group(1)))
+                    found = True
+            if not found:
+                raise _GTTSInternalsChanged("gTTS response carried no audio")
+        return buffer.getvalue()
+
+
+class _GTTSInternalsChanged(RuntimeError):
+    """gTTS's private request building or response format isn't what GTTSEngine expects."""
+
+
+class EspeakEngine(TTSEngine):
+    """espeak-ng on the local CPU. Output is MP3 when ffmpeg is installed, WAV otherwise."""
+
+    name = "espeak"
+
+    def __init__(self, binary=None, speed=140):
+        self.binary = binary or shutil.which("espeak-ng") or shutil.which("espeak")
+        self.speed = speed
+        self.ffmpeg = shutil.which("ffmpeg")
+
+    def version(self):
+        if not self.binary:
+            return ""
+        try:
+            out = subprocess.run([self.binary, "--version"], capture_output=True, text=True, timeout=2)
+        except (OSError, subprocess.SubprocessError):
+            return ""
+        return out.stdout.strip().split("\n")[0]
+
+    def available(self):
+        return bool(self.binary)
+
+    def synthesize(self, text, lang, timeout):
+        started = time.monotonic()
+        wav = subprocess.run(
+            [self.binary, "-v", lang, "-s", str(self.speed), "--stdout", text],
+            capture_output=True, timeout=timeout, check=True,
+        ).stdout
+        if not self.ffmpeg:
+            return wav
+        remaining = max(timeout - (time.monotonic() - started), 0.1)
+        return subprocess.run(
+            [self.ffmpeg, "-loglevel", "error", "-i", "pipe:0", "-ac", "1", "-ar", "24000",
+             "-b:a", "32k", "-f", "mp3", "pipe:1"],
+            input=wav, capture_output=True, timeout=remaining, check=True,
+        ).stdout
+
+
+ENGINE_TYPES = {
+    GTTSEngine.name: GTTSEngine,
+    EspeakEngine.name: EspeakEngine,
+}
+
+
+class _EngineStats:
+    def __init__(self, window=500):
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.latencies_ms = deque(maxlen=window)
+
+    def snapshot(self):
+        latencies = sorted(self.latencies_ms)
+
+        def pct(p):
+            return round(latencies[min(int(len(latencies) * p), len(latencies) - 1)], 1) if latencies else None
+
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+        }
+
+
+class TTSChain:
+    """Try engines in priority order with per-engine timeouts and latency stats."""
+
+    def __init__(self, engines, timeouts=None, cache=None, postprocessor=None):
+        self.engines = [engine for engine in engines if engine.available()]
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self.cache = cache if cache is not None else get_audio_cache()
+        self.postprocessor = postprocessor
+        profile = postprocessor.profile if postprocessor is not None else ""
+        # The processing profile is part of the version so settings changes miss the cache
+        self._versions = {
+            engine.name: engine.version() + (f"+{profile}" if profile else "") for engine in self.engines
+        }
+        self._stats = {engine.name: _EngineStats() for engine in self.engines}
+        self._lock = threading.Lock()
+        # Sessions voicing the same text at the same moment share one synthesis
+        self.flights = SingleFlight()
+
+    def primary(self):
+        """Highest-priority available engine, or None if none are installed."""
+        return self.engines[0] if self.engines else None
+
+    def engine_version(self, engine):
+        return self._versions[engine.name]
+
+    def cache_key(self, engine, text, lang):
+        return audio_cache_key(text, lang, engine=engine.name, version=self._versions[engine.name])
+
+    def lookup(self, text: str, lang: str = "ur"):
+        """Cached audio for `text` from any engine in priority order, without synthesizing."""
+        for engine in self.engines:
+            cached = self.cache.get(self.cache_key(engine, text, lang))
+            if cached is not None:
+                return cached
+        return None
+
+    def synthesize(self, text: str, lang: str = "ur") -> bytes:
+        """Return audio for `text` from the first engine that answers, or b""."""
+        if not text:
+            return b""
+        return self.flights.do((text, lang), self._synthesize, text, lang)
+
+    def _synthesize(self, text, lang):
+        for engine in self.engines:
+            key = self.cache_key(engine, text, lang)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+            if self._cooling_down(engine):
+                continue
+            audio = self._call(engine, text, lang, has_fallback=self._has_fallback(engine))
+            if audio:
+                if self.postprocessor is not None:
+                    audio = self.postprocessor.process(audio, label=text)
+                self.cache.put(key, audio)
+                return audio
+        return b""
+
+    def _cooling_down(self, engine):
+        with self._lock:
+            return time.monotonic() < self._stats[engine.name].cooldown_until
+
+    def _has_fallback(self, engine):
+        later = self.engines[self.engines.index(engine) + 1:]
+        return any(not self._cooling_down(other) for other in later)
+
+    def _call(self, engine, text, lang, has_fallback=False):
+        timeout = self.timeouts.get(engine.name, 4.0)
+        started = time.perf_counter()
+        # The engine's timeout bounds the whole call, queueing included, and
+        # it isn't retried when a later engine can take over
+        deadline = time.monotonic() + timeout
+        timed_out = False
+        try:
+            # Capped, rate-limited and retried per engine by the shared scheduler
+            audio = get_scheduler().call(
+                engine.name,
+                lambda: engine.synthesize(text, lang, max(deadline - time.monotonic(), 0.1)),
+                deadline=deadline,
+                retries=0 if has_fallback else None,
+            )
+        except Exception as exc:
+            audio = b""
+            timed_out = isinstance(exc, (TimeoutError, subprocess.TimeoutExpired)) or "timed out" in str(exc).lower()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            stats = self._stats[engine.name]
+            stats.calls += 1
+            stats.latencies_ms.append(elapsed_ms)
+            if audio:
+                stats.consecutive_failures = 0
+            else:
+                stats.failures += 1
+                stats.timeouts += int(timed_out)
+                stats.consecutive_failures += 1
+                if stats.consecutive_failures >= FAILURES_BEFORE_COOLDOWN:
+                    stats.cooldown_until = time.monotonic() + COOLDOWN_SECONDS
+                    stats.consecutive_failures = 0
+        return audio
+
+    def budget(self) -> float:
+        """Longest a synthesis can take: every engine's timeout in turn."""
+        return sum(self.timeouts.get(engine.name, 4.0) for engine in self.engines)
+
+    def stats(self) -> dict:
+        """Per-engine call counts, failures, timeouts and p50/p95 latency."""
+        with self._lock:
+            return {name: stats.snapshot() for name, stats in self._stats.items()}
+
+
+def _parse_timeouts(spec):
+    timeouts = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, seconds = item.partition("=")
+        try:
+            timeouts[name.strip()] = float(seconds)
+        except ValueError:
+            continue
+    return timeouts
+
+
+def build_tts_chain(order=DEFAULT_ENGINE_ORDER, timeouts=None):
+    """Build a chain from a comma-separated engine list; unknown names are ignored."""
+    names = [name.strip() for name in order.split(",") if name.strip() in ENGINE_TYPES]
+    if timeouts is None:
+        timeouts = _parse_timeouts(os.getenv("URDU_TTS_TIMEOUTS", ""))
+    return TTSChain([ENGINE_TYPES[name]() for name in names], timeouts=timeouts,
+                    postprocessor=AudioPostProcessor.from_env())
+
+
+_shared_chain = None
+_shared_chain_lock = threading.Lock()
+
+
+def get_tts_chain() -> TTSChain:
+    """Process-wide chain shared by every session."""
+    global _shared_chain
+    with _shared_chain_lock:
+        if _shared_chain is None:
+            _shared_chain = build_tts_chain()
+        return _shared_chain
@@ -0,0 +1,145 @@
+"""
+Shared, persistent cache of tutor-bot answers.
+
+Replaces the per-browser-session dict: answers live in SQLite so every
+session and worker process reuses them, keyed by normalized intent plus
+the conversation history the answer was generated from (see tutor_intents)
+rather than the raw input. Each row stores the answer text
+and a reference (content hash) to its audio in the shared audio cache.
+
+Entries expire after a TTL and the table is trimmed least-recently-used
+first once it grows past its size limit.
+
+Configuration:
+- URDU_TUTOR_CACHE_PATH         SQLite file (default .tutor_cache/responses.sqlite3)
+- URDU_TUTOR_CACHE_TTL          seconds an answer stays fresh (default 7 days)
+- URDU_TUTOR_CACHE_MAX_ENTRIES  row limit before LRU trimming (default 5000)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.getenv(
+    "URDU_TUTOR_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".tutor_cache", "responses.sqlite3"),
+)
+DEFAULT_TTL_SECONDS = float(os.getenv("URDU_TUTOR_CACHE_TTL", 7 * 24 * 3600))
+DEFAULT_MAX_ENTRIES = int(os.getenv("URDU_TUTOR_CACHE_MAX_ENTRIES", 5000))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    intent     TEXT PRIMARY KEY,
+    response   TEXT NOT NULL,
+    audio_ref  TEXT NOT NULL DEFAULT '',
+    created    REAL NOT NULL,
+    last_used  REAL NOT NULL,
+    hits       INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+
+class TutorResponseCache:
+    """SQLite-backed (TTL + LRU) cache of (answer text, audio ref) by intent."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "writes": 0, "evictions": 0}
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self):
+        # sqlite3 connections can't be shared across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            # WAL lets worker processes read while another writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._counters[name] += n
+
+    def get(self, intent):
+        """Return (response, audio_ref) for a fresh entry, or None."""
+        if not intent:
+            return None
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            "SELECT response, audio_ref, created FROM responses WHERE intent = ?", (intent,)
+        ).fetchone()
+        if row is None:
+            self._count("misses")
+            return None
+        response, audio_ref, created = row
+        if now - created > self.ttl_seconds:
+            conn.execute("DELETE FROM responses WHERE intent = ?", (intent,))
+            self._count("expired")
+            self._count("misses")
+            return None
+        conn.execute(
+            "UPDATE responses SET last_used = ?, hits = hits + 1 WHERE intent = ?", (now, intent)
+        )
+        self._count("hits")
+        return response, audio_ref
+
+    def put(self, intent, response, audio_ref=""):
+        if not intent or not response:
+            return
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            "INSERT INTO responses (intent, response, audio_ref, created, last_used) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(intent) DO UPDATE SET response = excluded.response, "
+            "audio_ref = excluded.audio_ref, created = excluded.created, last_used = excluded.last_used",
+            (intent, response, audio_ref or "", now, now),
+        )
+        self._count("writes")
+        self._evict(conn)
+
+    def _evict(self, conn):
+        (count,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        conn.execute(
+            "DELETE FROM responses WHERE intent IN "
+            "(SELECT intent FROM responses ORDER BY last_used ASC LIMIT ?)",
+            (excess,),
+        )
+        self._count("evictions", excess)
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process plus the shared table size."""
+        with self._lock:
+            stats = dict(self._counters)
+        (stats["entries"],) = self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> TutorResponseCache:
+    """Process-wide cache instance shared by every session."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = TutorResponseCache()
+        return _shared_cache
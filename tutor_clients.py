@@ -0,0 +1,110 @@
+"""
+Process-wide OpenAI clients and prompt for the tutor bot.
+
+Streamlit re-runs the whole script on every interaction, so anything built
+at module level there (ChatOpenAI, the prompt, an OpenAI client per Whisper
+call) was rebuilt each turn and every new client paid a fresh TLS handshake.
+These are built once per process instead and share one keep-alive HTTP
+connection pool; sessions only bind their own memory to them. The clients
+don't retry on their own: outbound.py schedules and retries every call.
+
+Configuration:
+- OPENAI_API_KEY             API key for chat and Whisper
+- OPENAI_BASE_URL            alternative API host, e.g. mock_services.py
+- URDU_TUTOR_MODEL           chat model (default gpt-3.5-turbo)
+- URDU_OPENAI_MAX_CONNECTIONS  connection pool size (default 20)
+"""
+
+import os
+import threading
+
+import httpx
+from langchain_core.prompts import ChatPromptTemplate, HumanMessagePromptTemplate, SystemMessagePromptTemplate
+
+DEFAULT_MODEL = os.getenv("URDU_TUTOR_MODEL", "gpt-3.5-turbo")
+MAX_CONNECTIONS = int(os.getenv("URDU_OPENAI_MAX_CONNECTIONS", 20))
+
+# Kid-friendly Urdu letter tutor instructions
+SYSTEM_TEMPLATE = """
+You are a 5-year-old Urdu letter tutor teaching 5-year-old children. Speak like a playful 5-year-old friend in simple, fun Urdu. Follow these instructions exactly:
+
+- Accept questions in mixed English and Urdu, like "What is ا?" or "ب kya hai?", but always respond only in simple, pure Urdu.
+- Teach Urdu letters in a fun, story-like way to make learning exciting.
+- For every letter, include one short example word using animals, fruits, or toys, like "ا آم کی ہے!".
+- Clearly state the letter and the example word in each response so they can be shown in big, bold text.
+- Never use difficult words; keep language very simple for 5-year-olds.
+- Keep responses to one or two short sentences.
+- Talk like a 5-year-old, using playful phrases like "واہ، ا بہت مزے کا ہے!".
+- Remember which letters the child has learned and suggest the next letter, like "ا سیکھ لیا؟ اب ب سیکھیں!".
+- If a question is not about letters, gently say, "آؤ، حروف سیکھیں!".
+- End every answer with a fun question, like "پرندے کا حرف سیکھیں؟".
+- Avoid any inappropriate content, such as violence, complex ideas, or anything not suitable for 5-year-olds.
+"""
+
+_lock = threading.Lock()
+_http_client = None
+_openai_client = None
+_chat_llm = None
+_prompt = None
+
+
+def _get_http_client():
+    # Callers hold _lock
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_CONNECTIONS,
+                keepalive_expiry=60,
+            ),
+            timeout=httpx.Timeout(60.0, connect=5.0),
+        )
+    return _http_client
+
+
+def get_openai_client():
+    """Shared OpenAI client (Whisper transcription)."""
+    global _openai_client
+    with _lock:
+        if _openai_client is None:
+            from openai import OpenAI
+
+            _openai_client = OpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                base_url=os.getenv("OPENAI_BASE_URL") or None,
+                http_client=_get_http_client(),
+                max_retries=0,
+            )
+        return _openai_client
+
+
+def get_chat_llm():
+    """Shared streaming chat model for the tutor."""
+    global _chat_llm
+    with _lock:
+        if _chat_llm is None:
+            from langchain_openai import ChatOpenAI
+
+            _chat_llm = ChatOpenAI(
+                model=DEFAULT_MODEL,
+                temperature=0.7,
+                openai_api_key=os.getenv("OPENAI_API_KEY"),
+                base_url=os.getenv("OPENAI_BASE_URL") or None,
+                streaming=True,
+                max_retries=0,
+                http_client=_get_http_client(),
+            )
+        return _chat_llm
+
+
+def get_tutor_prompt():
+    """System prompt plus history/input template, built once."""
+    global _prompt
+    with _lock:
+        if _prompt is None:
+            _prompt = ChatPromptTemplate.from_messages([
+                SystemMessagePromptTemplate.from_template(SYSTEM_TEMPLATE),
+                HumanMessagePromptTemplate.from_template("{history}\n{input}"),
+            ])
+        return _prompt
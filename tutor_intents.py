@@ -0,0 +1,89 @@
+"""
+Intent normalization for tutor-bot questions.
+
+Children ask about the same letter in many ways ("What is ا?", "ا kya hai",
+"alif kya hai?", "الف کیا ہے؟"). Normalizing those to a single intent lets every session
+share one cached answer instead of each phrasing missing the cache.
+
+Open-ended answers also depend on the conversation so far, so context_key()
+binds an intent to the history the answer was generated from.
+"""
+
+import hashlib
+import re
+import unicodedata
+
+from urdu_alphabet_data import URDU_ALPHABET_DATA
+
+_LETTERS = {letter["letter"]: letter for letter in URDU_ALPHABET_DATA["letters"]}
+_ROMAN_NAMES = {}
+for _letter in URDU_ALPHABET_DATA["letters"]:
+    _ROMAN_NAMES.setdefault(_letter["name"].lower(), set()).add(_letter["letter"])
+# Names shared by two letters ("Hay") can't identify one
+_ROMAN_NAMES = {name: letters.pop() for name, letters in _ROMAN_NAMES.items() if len(letters) == 1}
+# Letter names as Whisper writes them in Urdu script. ہ (ہے) is left out since
+# it is also "is", as are two-word names (نون غنہ, دو چشمی ہے).
+_URDU_NAMES = {
+    "الف": "ا", "بے": "ب", "پے": "پ", "تے": "ت", "ٹے": "ٹ", "ثے": "ث", "جیم": "ج",
+    "چے": "چ", "حے": "ح", "خے": "خ", "دال": "د", "ڈال": "ڈ", "ذال": "ذ", "رے": "ر",
+    "ڑے": "ڑ", "زے": "ز", "ژے": "ژ", "سین": "س", "شین": "ش", "صاد": "ص", "ضاد": "ض",
+    "طوئے": "ط", "ظوئے": "ظ", "عین": "ع", "غین": "غ", "فے": "ف", "قاف": "ق", "کاف": "ک",
+    "گاف": "گ", "لام": "ل", "میم": "م", "نون": "ن", "واؤ": "و", "واو": "و", "ہمزہ": "ء",
+    "یے": "ی",
+}
+_LETTER_NAMES = {**_ROMAN_NAMES, **_URDU_NAMES}
+# Words that can surround a letter in a plain "what is X?" question
+QUESTION_WORDS = {
+    "what", "whats", "is", "the", "a", "letter", "about", "tell", "me", "teach", "please",
+    "kya", "hai", "ka", "ki", "ke", "harf", "batao", "sikhao", "bolo", "ye", "yeh",
+    "کیا", "ہے", "کا", "کی", "کے", "حرف", "بتاؤ", "سکھاؤ", "بولو", "یہ",
+}
+# Letters, digits and combining marks; Urdu punctuation (؟ ، ۔) is not part of a word
+_WORD_CHARS = r"\w\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED"
+# A standalone letter: not part of a longer Urdu word
+_STANDALONE_LETTER_RE = re.compile(
+    rf"(?<![{_WORD_CHARS}])(" + "|".join(re.escape(l) for l in _LETTERS) + rf")(?![{_WORD_CHARS}])"
+)
+_WORD_RE = re.compile(r"[^\W\d_]+")
+
+
+def _clean(text):
+    text = unicodedata.normalize("NFC", text)
+    # Drop Arabic diacritics and tatweel so "اَ" and "ا" match
+    text = re.sub(r"[ً-ٰٟـ]", "", text)
+    return text.casefold().strip()
+
+
+def detect_letter(text):
+    """Return the single alphabet letter a question is about, or None.
+
+    Matches a standalone Urdu letter ("ب kya hai?") or a letter name in Roman
+    or Urdu script ("alif kya hai", "الف کیا ہے"), but only when every other word is question filler, so
+    open-ended sentences that merely mention a letter aren't misread.
+    Questions naming two or more letters return None.
+    """
+    text = _clean(text)
+    letters = set(_STANDALONE_LETTER_RE.findall(text))
+    for word in _WORD_RE.findall(text):
+        if word in _LETTER_NAMES:
+            letters.add(_LETTER_NAMES[word])
+        elif word not in _LETTERS and word not in QUESTION_WORDS:
+            return None
+    return letters.pop() if len(letters) == 1 else None
+
+
+def normalize_intent(text):
+    """Cache key for a question: "letter:<x>" for single-letter questions,
+    otherwise the question with case, punctuation and spacing normalized."""
+    letter = detect_letter(text)
+    if letter:
+        return f"letter:{letter}"
+    return "text:" + " ".join(_WORD_RE.findall(_clean(text)))
+
+
+def context_key(intent, history):
+    """Key for an answer generated from `history`: the intent plus a hash of the
+    rendered conversation, so one child's answer is never served to another
+    whose lesson so far differs."""
+    digest = hashlib.sha256(history.encode("utf-8")).hexdigest()[:16]
+    return f"{intent}@{digest}"
@@ -0,0 +1,94 @@
+"""
+Token-budgeted conversation memory for the tutor chain.
+
+ConversationBufferMemory keeps every turn, so the prompt (and its cost and
+latency) grows with each question. LessonMemory keeps a window of recent
+turns under a hard token budget plus a structured "letters already learned"
+list, which is all the tutor needs to suggest the next letter. Older turns
+are dropped once the window is over its turn or token limit.
+
+Configuration:
+- URDU_TUTOR_MEMORY_TOKENS  token budget for the rendered history (default 400)
+- URDU_TUTOR_MEMORY_TURNS   most recent turns kept (default 6)
+"""
+
+import os
+from typing import Any, Dict, List, Tuple
+
+from langchain_core.memory import BaseMemory
+from pydantic import Field
+
+from tutor_intents import detect_letter
+
+DEFAULT_MAX_TOKENS = int(os.getenv("URDU_TUTOR_MEMORY_TOKENS", 400))
+DEFAULT_MAX_TURNS = int(os.getenv("URDU_TUTOR_MEMORY_TURNS", 6))
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken missing or its encoding can't be downloaded
+    _encoding = None
+
+
+def count_tokens(text):
+    """Tokens in `text` for the OpenAI chat models (estimated without tiktoken)."""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    # Urdu script runs at roughly two characters per token
+    return len(text) // 2 + 1
+
+
+class LessonMemory(BaseMemory):
+    """Recent-turn window under a token budget plus the letters learned so far."""
+
+    memory_key: str = "history"
+    input_key: str = "input"
+    output_key: str = "response"
+    max_tokens: int = DEFAULT_MAX_TOKENS
+    max_turns: int = DEFAULT_MAX_TURNS
+    turns: List[Tuple[str, str]] = Field(default_factory=list)
+    letters_learned: List[str] = Field(default_factory=list)
+    dropped_turns: int = 0
+
+    @property
+    def memory_variables(self) -> List[str]:
+        return [self.memory_key]
+
+    def render(self) -> str:
+        """History as it goes into the prompt."""
+        lines = []
+        if self.letters_learned:
+            lines.append("Letters already learned: " + "، ".join(self.letters_learned))
+        for child, tutor in self.turns:
+            lines.append(f"Child: {child}")
+            lines.append(f"Tutor: {tutor}")
+        return "\n".join(lines)
+
+    def history_tokens(self) -> int:
+        return count_tokens(self.render())
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, str]:
+        return {self.memory_key: self.render()}
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        child = inputs.get(self.input_key, "")
+        tutor = outputs.get(self.output_key, "")
+        letter = detect_letter(child)
+        if letter and letter not in self.letters_learned:
+            self.letters_learned.append(letter)
+        self.turns.append((child, tutor))
+        self._trim()
+
+    def _trim(self):
+        # Drop the oldest turns until the window fits; the learned-letters
+        # list always stays, so "next letter" suggestions survive trimming
+        while self.turns and (len(self.turns) > self.max_turns or self.history_tokens() > self.max_tokens):
+            self.turns.pop(0)
+            self.dropped_turns += 1
+
+    def clear(self) -> None:
+        self.turns = []
+        self.letters_learned = []
+        self.dropped_turns = 0
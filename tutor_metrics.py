@@ -0,0 +1,353 @@
+"""
+Per-turn latency and token instrumentation for the tutor bot.
+
+Each turn is traced from input to the last audio clip: transcription time,
+time to first token, stream duration, prompt/completion tokens, TTS time,
+response-cache result and audio bytes. A finished turn is
+
+- logged as one JSON line on the "urdu_tutor.turns" logger, and
+- folded into process-wide counters and latency histograms, served in
+  Prometheus text format at /metrics together with the outbound scheduler's
+  queue gauges, each TTS engine's calls, failures and latency, the
+  response cache's hit rate and the lesson prefetcher's counts.
+
+Metrics are per process. Each worker serves its own at /metrics on the first
+free port from URDU_METRICS_PORT, so scrape every port in the range. The
+audio endpoint (audio_server) also serves /metrics, but only for the worker
+that owns it.
+
+RunMetrics times Streamlit script runs by scope ("app" for the whole script,
+a fragment's name for one fragment) and by rerun ("full" or "fragment"), so
+the cost of one click that reruns only a fragment is visible too.
+
+Configuration:
+- URDU_TURN_LOG=off   don't print turn log lines (metrics are still kept)
+- URDU_METRICS_PORT   first port tried for a worker's /metrics (default 9466);
+                      "off" disables the endpoint
+- URDU_METRICS_PORTS  how many ports workers may take from there (default 8)
+- URDU_METRICS_HOST   bind address (default 127.0.0.1; e.g. 0.0.0.0 for a
+                      scraper on another host)
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds (ms) of the latency histogram buckets
+DURATION_BUCKETS_MS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+METRICS_HOST = os.getenv("URDU_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = os.getenv("URDU_METRICS_PORT", "9466")
+METRICS_PORTS = int(os.getenv("URDU_METRICS_PORTS", 8))
+DURATION_FIELDS = ("transcribe_ms", "ttft_ms", "stream_ms", "tts_ms", "turn_ms")
+TOKEN_FIELDS = ("prompt_tokens", "completion_tokens")
+
+logger = logging.getLogger("urdu_tutor.turns")
+if os.getenv("URDU_TURN_LOG", "on") != "off" and not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+_server_logger = logging.getLogger("urdu_tutor.metrics")
+
+
+class TurnTrace:
+    """Timings and facts about one tutor turn, emitted by finish()."""
+
+    def __init__(self, session_id, source):
+        self.started = time.perf_counter()
+        self.fields = {
+            "turn_id": uuid.uuid4().hex[:12],
+            "session": session_id,
+            "source": source,
+            "path": "",
+        }
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+    def elapsed_ms(self, since=None):
+        return round((time.perf_counter() - (since if since is not None else self.started)) * 1000, 1)
+
+    @contextmanager
+    def timed(self, field):
+        """Record how long the block took as `field` (ms)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.fields[field] = self.elapsed_ms(started)
+
+    def finish(self, error=None):
+        """Log and record the turn; returns its fields."""
+        self.fields["turn_ms"] = self.elapsed_ms()
+        self.fields["status"] = "error" if error else "ok"
+        if error:
+            self.fields["error"] = str(error)[:200]
+        logger.info(json.dumps(self.fields, ensure_ascii=False))
+        get_turn_metrics().observe(self.fields)
+        return self.fields
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * len(DURATION_BUCKETS_MS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(DURATION_BUCKETS_MS):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def render(self, name, labels):
+        lines = []
+        for bound, count in zip(DURATION_BUCKETS_MS, self.counts):
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum:.1f}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class TurnMetrics:
+    """Counters and latency histograms aggregated over finished turns."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._turns = {}        # (path, status) -> count
+        self._cache = {}        # response cache result -> count
+        self._tokens = {field: 0 for field in TOKEN_FIELDS}
+        self._audio_bytes = 0
+        self._histograms = {}   # (field, path) -> _Histogram
+
+    def observe(self, fields):
+        path = fields.get("path") or "none"
+        with self._lock:
+            key = (path, fields.get("status", "ok"))
+            self._turns[key] = self._turns.get(key, 0) + 1
+            if fields.get("response_cache"):
+                result = fields["response_cache"]
+                self._cache[result] = self._cache.get(result, 0) + 1
+            for field in TOKEN_FIELDS:
+                self._tokens[field] += fields.get(field, 0)
+            self._audio_bytes += fields.get("audio_bytes", 0)
+            for field in DURATION_FIELDS:
+                if field in fields:
+                    self._histograms.setdefault((field, path), _Histogram()).observe(fields[field])
+
+    def render(self) -> str:
+        """Prometheus text exposition of the turn metrics."""
+        lines = ["# TYPE urdu_tutor_turns_total counter"]
+        with self._lock:
+            for (path, status), count in sorted(self._turns.items()):
+                lines.append(f'urdu_tutor_turns_total{{path="{path}",status="{status}"}} {count}')
+            lines.append("# TYPE urdu_tutor_response_cache_total counter")
+            for result, count in sorted(self._cache.items()):
+                lines.append(f'urdu_tutor_response_cache_total{{result="{result}"}} {count}')
+            for field, total in self._tokens.items():
+                lines.append(f"# TYPE urdu_tutor_{field}_total counter")
+                lines.append(f"urdu_tutor_{field}_total {total}")
+            lines.append("# TYPE urdu_tutor_audio_bytes_total counter")
+            lines.append(f"urdu_tutor_audio_bytes_total {self._audio_bytes}")
+            for field in DURATION_FIELDS:
+                name = f"urdu_tutor_{field[:-3]}_milliseconds"
+                lines.append(f"# TYPE {name} histogram")
+                for (hist_field, path), hist in sorted(self._histograms.items()):
+                    if hist_field == field:
+                        lines.extend(hist.render(name, f'path="{path}"'))
+        return "\n".join(lines) + "\n"
+
+
+class RunMetrics:
+    """Latency histograms of Streamlit script runs, per scope and kind of rerun."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}   # (scope, rerun) -> _Histogram
+        self._open = threading.local()
+
+    def observe(self, scope, duration_ms, rerun="full"):
+        with self._lock:
+            self._histograms.setdefault((scope, rerun), _Histogram()).observe(duration_ms)
+
+    @contextmanager
+    def timed(self, scope, rerun=None):
+        """Record how long the block took under `scope`, even if it reruns or stops.
+
+        Unless given, `rerun` is "full" for a block inside another timed block
+        on this thread (a fragment during a full rerun) and "fragment" for one
+        on its own (a fragment-only rerun).
+        """
+        depth = getattr(self._open, "depth", 0)
+        if rerun is None:
+            rerun = "full" if depth else "fragment"
+        self._open.depth = depth + 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._open.depth = depth
+            self.observe(scope, (time.perf_counter() - started) * 1000, rerun)
+
+    def render(self) -> str:
+        name = "urdu_app_run_milliseconds"
+        lines = [f"# TYPE {name} histogram"]
+        with self._lock:
+            for (scope, rerun), hist in sorted(self._histograms.items()):
+                lines.extend(hist.render(name, f'scope="{scope}",rerun="{rerun}"'))
+        return "\n".join(lines) + "\n"
+
+
+def _render_outbound():
+    from outbound import get_scheduler
+
+    gauges = {"queue_depth": "gauge", "active": "gauge", "calls": "counter", "retries": "counter",
+              "rate_limited": "counter", "failures": "counter"}
+    stats = get_scheduler().stats()
+    lines = []
+    for field, kind in gauges.items():
+        name = f"urdu_outbound_{field}" + ("_total" if kind == "counter" else "")
+        lines.append(f"# TYPE {name} {kind}")
+        for provider, entry in sorted(stats.items()):
+            lines.append(f'{name}{{provider="{provider}"}} {entry[field]}')
+    return "\n".join(lines) + "\n"
+
+
+def _render_tts():
+    from tts_engines import get_tts_chain
+
+    stats = get_tts_chain().stats()
+    lines = []
+    for field in ("calls", "failures", "timeouts"):
+        lines.append(f"# TYPE urdu_tts_{field}_total counter")
+        for engine, entry in sorted(stats.items()):
+            lines.append(f'urdu_tts_{field}_total{{engine="{engine}"}} {entry[field]}')
+    # Over each engine's last few hundred calls
+    lines.append("# TYPE urdu_tts_latency_milliseconds gauge")
+    for engine, entry in sorted(stats.items()):
+        for quantile, field in (("0.5", "p50_ms"), ("0.95", "p95_ms")):
+            if entry[field] is not None:
+                lines.append(f'urdu_tts_latency_milliseconds{{engine="{engine}",quantile="{quantile}"}} {entry[field]}')
+    return "\n".join(lines) + "\n"
+
+
+def _render_response_cache():
+    # Only the tutor bot has a response cache; don't open one just to report on it
+    if "tutor_cache" not in sys.modules:
+        return ""
+    from tutor_cache import get_response_cache
+
+    stats = get_response_cache().stats()
+    lines = []
+    for field in ("hits", "misses", "expired", "writes", "evictions"):
+        lines.append(f"# TYPE urdu_response_cache_{field}_total counter")
+        lines.append(f"urdu_response_cache_{field}_total {stats[field]}")
+    lines.append("# TYPE urdu_response_cache_hit_ratio gauge")
+    lines.append(f"urdu_response_cache_hit_ratio {stats['hit_rate']:.4f}")
+    lines.append("# TYPE urdu_response_cache_entries gauge")
+    lines.append(f"urdu_response_cache_entries {stats['entries']}")
+    return "\n".join(lines) + "\n"
+
+
+def _render_prefetch():
+    if "tutor_prefetch" not in sys.modules:
+        return ""
+    from tutor_prefetch import get_prefetcher
+
+    stats = get_prefetcher().stats()
+    lines = []
+    for field in ("scheduled", "already_cached", "completed", "failed", "cancelled", "over_budget"):
+        lines.append(f"# TYPE urdu_prefetch_{field}_total counter")
+        lines.append(f"urdu_prefetch_{field}_total {stats[field]}")
+    lines.append("# TYPE urdu_prefetch_pending gauge")
+    lines.append(f"urdu_prefetch_pending {stats['pending']}")
+    return "\n".join(lines) + "\n"
+
+
+def render_metrics() -> str:
+    """Everything /metrics serves: this process's turn, run, outbound, TTS, cache and prefetch metrics."""
+    return (get_turn_metrics().render() + get_run_metrics().render() + _render_outbound() + _render_tts()
+            + _render_response_cache() + _render_prefetch())
+
+
+_shared_metrics = None
+_shared_metrics_lock = threading.Lock()
+
+
+def get_turn_metrics() -> TurnMetrics:
+    """Process-wide metrics shared by every session."""
+    global _shared_metrics
+    with _shared_metrics_lock:
+        if _shared_metrics is None:
+            _shared_metrics = TurnMetrics()
+        return _shared_metrics
+
+
+_shared_run_metrics = None
+_shared_run_metrics_lock = threading.Lock()
+
+
+def get_run_metrics() -> RunMetrics:
+    """Process-wide script-run metrics shared by every session."""
+    global _shared_run_metrics
+    with _shared_run_metrics_lock:
+        if _shared_run_metrics is None:
+            _shared_run_metrics = RunMetrics()
+        return _shared_run_metrics
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_metrics_port = None
+_metrics_server_lock = threading.Lock()
+
+
+def ensure_metrics_server():
+    """Serve this process's /metrics on the first free port; returns the port, or None."""
+    global _metrics_port
+    if METRICS_PORT.lower() in ("", "0", "off", "false", "no"):
+        return None
+    with _metrics_server_lock:
+        if _metrics_port is None:
+            try:
+                first = int(METRICS_PORT)
+            except ValueError:
+                _server_logger.warning("URDU_METRICS_PORT=%r is not a port; /metrics is off", METRICS_PORT)
+                _metrics_port = 0
+                return None
+            for port in range(first, first + METRICS_PORTS):
+                try:
+                    server = ThreadingHTTPServer((METRICS_HOST, port), _MetricsRequestHandler)
+                except OSError:
+                    continue  # another worker's
+                server.daemon_threads = True
+                threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+                _metrics_port = port
+                break
+            else:
+                _metrics_port = 0  # every port taken; don't retry each run
+        return _metrics_port or None
@@ -0,0 +1,131 @@
+"""
+Speculative prefetch of the next letter's lesson.
+
+Every tutor answer nudges the child toward the next letter, so after a
+question about letter N the likely follow-up is letter N+1 (in
+URDU_ALPHABET_DATA id order). The answer text for a letter is
+deterministic (tutor_router), so what's worth precomputing is its audio:
+the prefetcher voices it in the background into the shared audio cache,
+and the follow-up question then plays from cache.
+
+Prefetching runs on its own single low-priority worker so it never delays
+interactive synthesis, is capped per minute across all sessions, and a
+session's pending prefetch is cancelled when it asks something else.
+
+Configuration:
+- URDU_PREFETCH_AHEAD       letters to prefetch after each answer (default 1)
+- URDU_PREFETCH_PER_MINUTE  prefetch syntheses per minute, 0 disables (default 30)
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from audio_bundle import bundled_audio
+from tts_engines import get_tts_chain
+from tutor_router import letter_answer, next_letter
+
+DEFAULT_AHEAD = int(os.getenv("URDU_PREFETCH_AHEAD", 1))
+DEFAULT_PER_MINUTE = int(os.getenv("URDU_PREFETCH_PER_MINUTE", 30))
+
+
+class LessonPrefetcher:
+    """Voice upcoming letter answers in the background, within a rate budget."""
+
+    def __init__(self, ahead=DEFAULT_AHEAD, per_minute=DEFAULT_PER_MINUTE, chain=None, lang="ur"):
+        self.ahead = ahead
+        self.per_minute = per_minute
+        self.lang = lang
+        self._chain = chain
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._recent = deque()
+        self._counters = {"scheduled": 0, "already_cached": 0, "completed": 0, "failed": 0,
+                          "cancelled": 0, "over_budget": 0}
+
+    @property
+    def chain(self):
+        return self._chain if self._chain is not None else get_tts_chain()
+
+    def _take_budget(self):
+        # Callers hold _lock
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] > 60:
+            self._recent.popleft()
+        if len(self._recent) >= self.per_minute:
+            return False
+        self._recent.append(now)
+        return True
+
+    def schedule(self, session_id, letter):
+        """Prefetch the letters after `letter` for `session_id`; returns the letters queued.
+
+        Replaces (cancels) anything still queued for the session.
+        """
+        self.cancel(session_id)
+        targets = []
+        current = letter
+        for _ in range(self.ahead):
+            current = next_letter(current)
+            if current is None:
+                break
+            targets.append(current)
+
+        futures = []
+        queued = []
+        for target in targets:
+            text = letter_answer(target)
+            if bundled_audio(text, self.lang) or self.chain.lookup(text, self.lang) is not None:
+                self._count("already_cached")
+                continue
+            with self._lock:
+                if not self._take_budget():
+                    self._counters["over_budget"] += 1
+                    break
+                self._counters["scheduled"] += 1
+            futures.append(self._pool.submit(self._prefetch, text))
+            queued.append(target)
+        if futures:
+            with self._lock:
+                self._pending[session_id] = futures
+        return queued
+
+    def cancel(self, session_id):
+        """Drop a session's prefetches that haven't started yet."""
+        with self._lock:
+            futures = self._pending.pop(session_id, [])
+        cancelled = sum(future.cancel() for future in futures)
+        if cancelled:
+            self._count("cancelled", cancelled)
+
+    def _prefetch(self, text):
+        # Goes through the chain's single flight, so a child asking while
+        # this runs waits for it instead of synthesizing twice
+        audio = self.chain.synthesize(text, self.lang)
+        self._count("completed" if audio else "failed")
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._counters[name] += n
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["pending"] = sum(not f.done() for futures in self._pending.values() for f in futures)
+        return stats
+
+
+_shared_prefetcher = None
+_shared_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher() -> LessonPrefetcher:
+    """Process-wide prefetcher shared by every session."""
+    global _shared_prefetcher
+    with _shared_prefetcher_lock:
+        if _shared_prefetcher is None:
+            _shared_prefetcher = LessonPrefetcher()
+        return _shared_prefetcher
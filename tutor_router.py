@@ -0,0 +1,60 @@
+"""
+Deterministic fast path for the tutor bot.
+
+Most questions are "X kya hai?" / "What is X?" about one letter, and the
+answer is already in URDU_ALPHABET_DATA. The router answers those from the
+dataset with kid-style templates, with no LLM call, and returns None for
+open-ended input so the caller falls back to the LLM.
+
+Answers are deterministic per letter, so the audio bundle pre-renders them.
+"""
+
+from tutor_intents import detect_letter
+from urdu_alphabet_data import URDU_ALPHABET_DATA
+
+_LETTERS = sorted(URDU_ALPHABET_DATA["letters"], key=lambda letter: letter["id"])
+_BY_LETTER = {letter["letter"]: letter for letter in _LETTERS}
+
+# Simple, playful Urdu in the tutor's voice: the letter, an example word,
+# the next letter to learn, and a question to end on
+ANSWER_TEMPLATES = [
+    "واہ! {letter} سے {word}۔ {letter} بہت مزے کا حرف ہے! اب {next} سیکھیں؟",
+    "{letter} سے {word} بنتا ہے! ہے نا مزے کا؟ چلو اب {next} سیکھیں؟",
+    "یہ {letter} ہے! {letter} سے {word}، اور {word2} بھی! کیا اب {next} سیکھو گے؟",
+]
+LAST_LETTER_TEMPLATE = "واہ! {letter} سے {word}۔ شاباش، تم نے سارے حروف سیکھ لیے! پھر سے کھیلیں؟"
+
+
+def next_letter(letter):
+    """The letter after `letter` in alphabet order, or None after the last one."""
+    index = _LETTERS.index(_BY_LETTER[letter])
+    return _LETTERS[index + 1]["letter"] if index + 1 < len(_LETTERS) else None
+
+
+def letter_answer(letter):
+    """Kid-style answer about `letter` built from the alphabet data."""
+    data = _BY_LETTER[letter]
+    words = [w["word"] for w in data.get("words", [])] or [letter]
+    values = {
+        "letter": letter,
+        "word": words[0],
+        "word2": words[1] if len(words) > 1 else words[0],
+        "next": next_letter(letter),
+    }
+    if values["next"] is None:
+        return LAST_LETTER_TEMPLATE.format(**values)
+    # Pick by letter id so each letter always gets the same (pre-rendered) answer
+    template = ANSWER_TEMPLATES[data["id"] % len(ANSWER_TEMPLATES)]
+    if "{word2}" in template and len(words) < 2:
+        template = ANSWER_TEMPLATES[0]
+    return template.format(**values)
+
+
+def all_letter_answers():
+    return [letter_answer(letter["letter"]) for letter in _LETTERS]
+
+
+def answer_from_dataset(text):
+    """Answer a single-letter question from the dataset, or None for the LLM."""
+    letter = detect_letter(text)
+    return letter_answer(letter) if letter else None
@@ -0,0 +1,106 @@
+"""
+Big, bold styling of the letters and example words in tutor answers.
+
+Highlighting is driven by the alphabet lexicon (alphabet_lexicon): one
+linear pass finds every standalone letter and known example word, so the
+right tokens are styled and a text is never rescanned.
+
+style_response() styles a finished answer. StreamingStyler splits an answer
+that is still streaming into sentence segments that are styled once when
+they complete; only the sentence being written is restyled per chunk, so
+per-chunk cost stays constant however long the answer grows.
+
+UpdateThrottle paces how often the streaming view is redrawn, since every
+redraw is a websocket delta to the browser.
+
+Configuration:
+- URDU_STREAM_FLUSH_MS  minimum ms between streaming redraws (default 120);
+                        sentence boundaries always redraw
+"""
+
+import os
+import re
+import time
+
+from alphabet_lexicon import LETTER, get_lexicon
+
+SEGMENT_END_RE = re.compile(r'[.!?۔؟]+\s+')
+STREAM_FLUSH_MS = float(os.getenv("URDU_STREAM_FLUSH_MS", 120))
+_SPAN_STYLE = {
+    LETTER: "font-size: 32px; font-weight: bold;",
+}
+_WORD_STYLE = "font-size: 28px; font-weight: bold;"
+
+
+def style_response(response_text, final=True):
+    """Style the letters and example words in big, bold text.
+
+    With final=False (text still streaming), a token touching the end of the
+    text isn't styled yet, since it may turn out to be a longer word.
+    """
+    parts = []
+    position = 0
+    for start, end, kind in get_lexicon().find(response_text, final=final):
+        style = _SPAN_STYLE.get(kind, _WORD_STYLE)
+        parts.append(response_text[position:start])
+        parts.append(f"<span style='{style}'>{response_text[start:end]}</span>")
+        position = end
+    parts.append(response_text[position:])
+    return "".join(parts)
+
+
+class StreamingStyler:
+    """Incremental style_response() for a streaming answer.
+
+    feed() returns the sentence segments completed by a chunk; style() renders
+    a segment; `tail` is the sentence still being written.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._segment_start = 0
+
+    @property
+    def tail(self):
+        return self.text[self._segment_start:]
+
+    def feed(self, chunk):
+        self.text += chunk
+        segments = []
+        for match in SEGMENT_END_RE.finditer(self.text, self._segment_start):
+            segments.append(self.text[self._segment_start:match.end()])
+            self._segment_start = match.end()
+        return segments
+
+    def finish(self):
+        """Flush at end of stream; returns the last segment (may be empty)."""
+        segment = self.tail
+        self._segment_start = len(self.text)
+        return segment
+
+    def style(self, segment, final=True):
+        return style_response(segment, final=final)
+
+    def style_tail(self):
+        return self.style(self.tail, final=False)
+
+
+class UpdateThrottle:
+    """Coalesce streaming redraws to at most one per `interval_ms`.
+
+    due(force=True) always redraws (e.g. at a sentence boundary); `updates`
+    counts the redraws allowed.
+    """
+
+    def __init__(self, interval_ms=STREAM_FLUSH_MS):
+        self.interval = interval_ms / 1000
+        self.updates = 0
+        self._last = None
+
+    def due(self, force=False):
+        now = time.monotonic()
+        if force or self._last is None or now - self._last >= self.interval:
+            self._last = now
+            self.updates += 1
+            return True
+        return False
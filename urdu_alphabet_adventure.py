@@ -12,78 +12,90 @@ import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import random
 import time
-from io import BytesIO
-from gtts import gTTS
-import base64
 from streamlit.components.v1 import html as st_html
+from audio_playback import ClipSequence, autoplay_audio
+from audio_server import NARRATION_GAP_MS, narration_src
+from audio_bundle import bundled_audio, get_primary_bundle
+from audio_sequence import split_for_tts, stitch_mp3_cached, submit_synthesis, synthesize_sequence
+from letter_grid import letter_grid
+from tts_engines import get_tts_chain
+from tutor_metrics import ensure_metrics_server, get_run_metrics
+from urdu_alphabet_data import (
+    URDU_ALPHABET_DATA,
+    GUIDED_PRACTICE_TEXT,
+    ALPHABET_RECITAL_TEXT,
+    GAMES_GUIDE_TEXT,
+    SOUND_GAME_PROMPT,
+    LETTER_PROMPT_TEMPLATE,
+)
 
 # ===== VOICE FUNCTIONALITY =====
 def _tts_generate_audio_bytes(text: str, lang: str = "ur") -> bytes:
-    """Generate TTS audio bytes for given text using gTTS (Urdu by default)."""
-    try:
-        if not text:
-            return b""
-        buffer = BytesIO()
-        tts = gTTS(text=text, lang=lang)
-        tts.write_to_fp(buffer)
-        buffer.seek(0)
-        return buffer.read()
-    except Exception:
+    """Generate TTS audio bytes for given text (Urdu by default).
+
+    Fixed prompts come from the pre-rendered bundle; anything else goes
+    through the TTS engine chain (gTTS, then local espeak-ng by default),
+    which serves repeats from the shared audio cache.
+    """
+    if not text:
         return b""
+    bundled = bundled_audio(text, lang)
+    if bundled:
+        return bundled
+    return get_tts_chain().synthesize(text, lang)
 
 
 def _render_autoplay_audio(audio_bytes: bytes):
-    """Render hidden HTML5 audio element that autoplays once without showing any UI."""
-    if not audio_bytes:
-        return
-    b64 = base64.b64encode(audio_bytes).decode("ascii")
-    st_html(
-        f"""
-        <div style='display:none;'>
-            <audio src="data:audio/mp3;base64,{b64}" autoplay></audio>
-        </div>
-        """,
-        height=0,
-    )
+    """Autoplay a clip once without showing any UI."""
+    autoplay_audio(audio_bytes)
 
 
-def _render_autoplay_sequence(audio_bytes_list, delay_ms_between: int = 1200):
-    """Autoplay multiple audios in sequence, hidden from view."""
+def _render_autoplay_sequence(audio_bytes_list, delay_ms_between: int = 1200, gap_ms: int = 350,
+                              stitched: bool = True):
+    """Autoplay multiple audios in sequence, hidden from view.
+
+    By default the clips are stitched server-side into one track with `gap_ms`
+    of silence between them; if that fails they are played one after another,
+    allowing `delay_ms_between` for any clip whose length can't be read.
+    """
     if not audio_bytes_list:
         return
-    ids = [f"aud_{i}" for i in range(len(audio_bytes_list))]
-    sources = [base64.b64encode(b).decode("ascii") for b in audio_bytes_list if b]
-    if not sources:
+    if stitched:
+        track = stitch_mp3_cached(audio_bytes_list, gap_ms=gap_ms)
+        if track:
+            _render_autoplay_audio(track)
+            return
+    sequence = ClipSequence(gap_ms=gap_ms, default_ms=delay_ms_between)
+    for clip in audio_bytes_list:
+        sequence.play(clip)
+
+
+def _render_autoplay_narration(text: str, lang: str = "ur"):
+    """Autoplay long narration, starting as soon as its first sentence is synthesized."""
+    bundled = bundled_audio(text, lang)
+    if bundled:
+        _render_autoplay_audio(bundled)
         return
-    audios_html = "\n".join(
-        [f"<audio id='{ids[i]}' src='data:audio/mp3;base64,{sources[i]}' preload='auto'></audio>" for i in range(len(sources))]
-    )
-    st_html(
-        f"""
-        <div style='display:none;'>
-            {audios_html}
-            <script>
-            (function() {{
-                const ids = {ids};
-                let i = 0;
-                function playNext() {{
-                    if (i >= ids.length) return;
-                    const a = document.getElementById(ids[i]);
-                    if (!a) return;
-                    a.currentTime = 0;
-                    a.play().catch(function(){{}});
-                    i++;
-                    if (i < ids.length) {{
-                        setTimeout(playNext, {delay_ms_between});
-                    }}
-                }}
-                setTimeout(playNext, 50);
-            }})();
-            </script>
-        </div>
-        """,
-        height=0,
-    )
+    src = narration_src(text, lang=lang)
+    if src:
+        st_html(
+            f"""
+            <div style='display:none;'>
+                <audio src="{src}" autoplay></audio>
+            </div>
+            """,
+            height=0,
+        )
+        return
+    # No audio endpoint: play each chunk in the page as soon as it is voiced
+    chain = get_tts_chain()
+    sequence = ClipSequence(gap_ms=NARRATION_GAP_MS)
+    for chunk in split_for_tts(text):
+        sequence.add(submit_synthesis(chain.synthesize, chunk, lang))
+    sequence.drain()
+    if not sequence.played:
+        # Nothing came back for the chunks; try the narration as one clip
+        _render_autoplay_audio(chain.synthesize(text, lang))
 
 
 def create_voice_button(text, voice_id: str = "voice_btn", lang: str = "ur"):
@@ -105,500 +117,13 @@ def create_guided_practice_section():
     with col1:
         if st.button("🎤 رہنمائی کے ساتھ مشق شروع کریں", key="guided_practice"):
             st.success("🎤 مشق شروع ہو رہی ہے...")
-            practice_text = (
-                "آئیے مل کر اردو حروف کی مشق کرتے ہیں۔ غور سے سنیں اور میرے بعد دہرائیں۔"
-            )
-            _render_autoplay_audio(_tts_generate_audio_bytes(practice_text, lang="ur"))
+            _render_autoplay_audio(_tts_generate_audio_bytes(GUIDED_PRACTICE_TEXT, lang="ur"))
 
     with col2:
         if st.button("📚 مکمل حروف پڑھیں", key="recite_alphabet"):
             st.success("📚 مکمل اردو حروف پڑھ رہا ہوں...")
-            recite_text = (
-                "اب میں مکمل اردو حروف پڑھوں گا: الف، بے، پے، تے، ٹے، ثے، جیم، چے، حے، خے، دال، ڈال، ذال، رے، ڑے، زے، ژے، سین، شین، صاد، ضاد، طے، ظے، عین، غین، فے، قاف، کاف، گاف، لام، میم، نون، نون غنہ، واؤ، ہے، ھے دو چشمی، ہمزہ، یے"
-            )
-            _render_autoplay_audio(_tts_generate_audio_bytes(recite_text, lang="ur"))
-
-
-# ===== URDU ALPHABET DATA =====
-URDU_ALPHABET_DATA = {
-    "letters": [
-        {
-            "id": 1,
-            "letter": "ا",
-            "name": "Alif",
-            "english": "A",
-            "sound": "aa",
-            "words": [
-                {"word": "آم", "meaning": "Mango", "english": "Aam"},
-                {"word": "آنکھ", "meaning": "Eye", "english": "Aankh"},
-                {"word": "اسکول", "meaning": "School", "english": "School"}
-            ],
-            "color": "#FF6B6B"
-        },
-        {
-            "id": 2,
-            "letter": "ب",
-            "name": "Bay",
-            "english": "B",
-            "sound": "ba",
-            "words": [
-                {"word": "بلی", "meaning": "Cat", "english": "Billi"},
-                {"word": "بکری", "meaning": "Goat", "english": "Bakri"},
-                {"word": "بندر", "meaning": "Monkey", "english": "Bandar"}
-            ],
-            "color": "#4ECDC4"
-        },
-        {
-            "id": 3,
-            "letter": "پ",
-            "name": "Pay",
-            "english": "P",
-            "sound": "pa",
-            "words": [
-                {"word": "پانی", "meaning": "Water", "english": "Paani"},
-                {"word": "پھل", "meaning": "Fruit", "english": "Phal"},
-                {"word": "پرندہ", "meaning": "Bird", "english": "Parinda"}
-            ],
-            "color": "#45B7D1"
-        },
-        {
-            "id": 4,
-            "letter": "ت",
-            "name": "Tay",
-            "english": "T",
-            "sound": "ta",
-            "words": [
-                {"word": "تتلی", "meaning": "Butterfly", "english": "Titli"},
-                {"word": "تیرنا", "meaning": "Swimming", "english": "Tairna"},
-                {"word": "تارا", "meaning": "Star", "english": "Tara"}
-            ],
-            "color": "#96CEB4"
-        },
-        {
-            "id": 5,
-            "letter": "ٹ",
-            "name": "Ttay",
-            "english": "Tt",
-            "sound": "tta",
-            "words": [
-                {"word": "ٹماٹر", "meaning": "Tomato", "english": "Tamatar"},
-                {"word": "ٹوپی", "meaning": "Hat", "english": "Topi"},
-                {"word": "ٹرین", "meaning": "Train", "english": "Train"}
-            ],
-            "color": "#FFEAA7"
-        },
-        {
-            "id": 6,
-            "letter": "ث",
-            "name": "Say",
-            "english": "S",
-            "sound": "sa",
-            "words": [
-                {"word": "ثعبان", "meaning": "Snake", "english": "Saaban"},
-                {"word": "ثواب", "meaning": "Reward", "english": "Sawab"}
-            ],
-            "color": "#DDA0DD"
-        },
-        {
-            "id": 7,
-            "letter": "ج",
-            "name": "Jeem",
-            "english": "J",
-            "sound": "ja",
-            "words": [
-                {"word": "جہاز", "meaning": "Ship/Plane", "english": "Jahaaz"},
-                {"word": "جانور", "meaning": "Animal", "english": "Janwar"},
-                {"word": "جوتا", "meaning": "Shoe", "english": "Joota"}
-            ],
-            "color": "#FFB347"
-        },
-        {
-            "id": 8,
-            "letter": "چ",
-            "name": "Chay",
-            "english": "Ch",
-            "sound": "cha",
-            "words": [
-                {"word": "چاند", "meaning": "Moon", "english": "Chaand"},
-                {"word": "چائے", "meaning": "Tea", "english": "Chai"},
-                {"word": "چڑیا", "meaning": "Sparrow", "english": "Chiriya"}
-            ],
-            "color": "#FF69B4"
-        },
-        {
-            "id": 9,
-            "letter": "ح",
-            "name": "Hay",
-            "english": "H",
-            "sound": "ha",
-            "words": [
-                {"word": "حج", "meaning": "Pilgrimage", "english": "Hajj"},
-                {"word": "حساب", "meaning": "Math", "english": "Hisaab"}
-            ],
-            "color": "#87CEEB"
-        },
-        {
-            "id": 10,
-            "letter": "خ",
-            "name": "Khay",
-            "english": "Kh",
-            "sound": "kha",
-            "words": [
-                {"word": "خرگوش", "meaning": "Rabbit", "english": "Khargosh"},
-                {"word": "خوشی", "meaning": "Happiness", "english": "Khushi"},
-                {"word": "خواب", "meaning": "Dream", "english": "Khwab"}
-            ],
-            "color": "#98FB98"
-        },
-        {
-            "id": 11,
-            "letter": "د",
-            "name": "Daal",
-            "english": "D",
-            "sound": "da",
-            "words": [
-                {"word": "دودھ", "meaning": "Milk", "english": "Doodh"},
-                {"word": "درخت", "meaning": "Tree", "english": "Darakht"},
-                {"word": "دل", "meaning": "Heart", "english": "Dil"}
-            ],
-            "color": "#FF8C94"
-        },
-        {
-            "id": 12,
-            "letter": "ڈ",
-            "name": "Ddaal",
-            "english": "Dd",
-            "sound": "dda",
-            "words": [
-                {"word": "ڈبہ", "meaning": "Box", "english": "Dabba"},
-                {"word": "ڈاکٹر", "meaning": "Doctor", "english": "Doctor"}
-            ],
-            "color": "#A8E6CF"
-        },
-        {
-            "id": 13,
-            "letter": "ذ",
-            "name": "Zaal",
-            "english": "Z",
-            "sound": "za",
-            "words": [
-                {"word": "ذہن", "meaning": "Mind", "english": "Zehan"},
-                {"word": "ذخم", "meaning": "Wound", "english": "Zakham"}
-            ],
-            "color": "#FFD3A5"
-        },
-        {
-            "id": 14,
-            "letter": "ر",
-            "name": "Ray",
-            "english": "R",
-            "sound": "ra",
-            "words": [
-                {"word": "روٹی", "meaning": "Bread", "english": "Roti"},
-                {"word": "رنگ", "meaning": "Color", "english": "Rang"},
-                {"word": "راجا", "meaning": "King", "english": "Raja"}
-            ],
-            "color": "#B8A9C9"
-        },
-        {
-            "id": 15,
-            "letter": "ڑ",
-            "name": "Rray",
-            "english": "Rr",
-            "sound": "rra",
-            "words": [
-                {"word": "کڑک", "meaning": "Thunder", "english": "Karak"},
-                {"word": "پڑھنا", "meaning": "To Read", "english": "Parhna"}
-            ],
-            "color": "#C7CEEA"
-        },
-        {
-            "id": 16,
-            "letter": "ز",
-            "name": "Zay",
-            "english": "Z",
-            "sound": "za",
-            "words": [
-                {"word": "زرافہ", "meaning": "Giraffe", "english": "Zarafa"},
-                {"word": "زمین", "meaning": "Earth", "english": "Zameen"},
-                {"word": "زندگی", "meaning": "Life", "english": "Zindagi"}
-            ],
-            "color": "#F38BA8"
-        },
-        {
-            "id": 17,
-            "letter": "ژ",
-            "name": "Zhay",
-            "english": "Zh",
-            "sound": "zha",
-            "words": [
-                {"word": "ژالہ", "meaning": "Dew", "english": "Zhala"}
-            ],
-            "color": "#FAB795"
-        },
-        {
-            "id": 18,
-            "letter": "س",
-            "name": "Seen",
-            "english": "S",
-            "sound": "sa",
-            "words": [
-                {"word": "سورج", "meaning": "Sun", "english": "Suraj"},
-                {"word": "سیب", "meaning": "Apple", "english": "Seb"},
-                {"word": "سمندر", "meaning": "Ocean", "english": "Samundar"}
-            ],
-            "color": "#79C99E"
-        },
-        {
-            "id": 19,
-            "letter": "ش",
-            "name": "Sheen",
-            "english": "Sh",
-            "sound": "sha",
-            "words": [
-                {"word": "شیر", "meaning": "Lion", "english": "Sher"},
-                {"word": "شہد", "meaning": "Honey", "english": "Shahad"},
-                {"word": "شہر", "meaning": "City", "english": "Shehar"}
-            ],
-            "color": "#A8DADC"
-        },
-        {
-            "id": 20,
-            "letter": "ص",
-            "name": "Swaad",
-            "english": "S",
-            "sound": "sa",
-            "words": [
-                {"word": "صابن", "meaning": "Soap", "english": "Sabun"},
-                {"word": "صفر", "meaning": "Zero", "english": "Sifar"}
-            ],
-            "color": "#F1C0E8"
-        },
-        {
-            "id": 21,
-            "letter": "ض",
-            "name": "Zwaad",
-            "english": "Z",
-            "sound": "za",
-            "words": [
-                {"word": "ضرور", "meaning": "Surely", "english": "Zaroor"}
-            ],
-            "color": "#CFBAF0"
-        },
-        {
-            "id": 22,
-            "letter": "ط",
-            "name": "Toay",
-            "english": "T",
-            "sound": "ta",
-            "words": [
-                {"word": "طوطا", "meaning": "Parrot", "english": "Tota"},
-                {"word": "طالب", "meaning": "Student", "english": "Talib"}
-            ],
-            "color": "#A3C4F3"
-        },
-        {
-            "id": 23,
-            "letter": "ظ",
-            "name": "Zoay",
-            "english": "Z",
-            "sound": "za",
-            "words": [
-                {"word": "ظہر", "meaning": "Noon", "english": "Zuhar"}
-            ],
-            "color": "#90DBF4"
-        },
-        {
-            "id": 24,
-            "letter": "ع",
-            "name": "Ain",
-            "english": "A",
-            "sound": "aa",
-            "words": [
-                {"word": "عقل", "meaning": "Wisdom", "english": "Aql"},
-                {"word": "عید", "meaning": "Festival", "english": "Eid"}
-            ],
-            "color": "#8EECF5"
-        },
-        {
-            "id": 25,
-            "letter": "غ",
-            "name": "Ghain",
-            "english": "Gh",
-            "sound": "gha",
-            "words": [
-                {"word": "غذا", "meaning": "Food", "english": "Ghaza"},
-                {"word": "غم", "meaning": "Sadness", "english": "Gham"}
-            ],
-            "color": "#98F5E1"
-        },
-        {
-            "id": 26,
-            "letter": "ف",
-            "name": "Fay",
-            "english": "F",
-            "sound": "fa",
-            "words": [
-                {"word": "فیل", "meaning": "Elephant", "english": "Feel"},
-                {"word": "فول", "meaning": "Beans", "english": "Phool"},
-                {"word": "فرشتہ", "meaning": "Angel", "english": "Farishta"}
-            ],
-            "color": "#B9FBC0"
-        },
-        {
-            "id": 27,
-            "letter": "ق",
-            "name": "Qaaf",
-            "english": "Q",
-            "sound": "qa",
-            "words": [
-                {"word": "قلم", "meaning": "Pen", "english": "Qalam"},
-                {"word": "قرآن", "meaning": "Quran", "english": "Quran"}
-            ],
-            "color": "#FDE68A"
-        },
-        {
-            "id": 28,
-            "letter": "ک",
-            "name": "Kaaf",
-            "english": "K",
-            "sound": "ka",
-            "words": [
-                {"word": "کتاب", "meaning": "Book", "english": "Kitab"},
-                {"word": "کیلا", "meaning": "Banana", "english": "Kela"},
-                {"word": "کبوتر", "meaning": "Pigeon", "english": "Kabootar"}
-            ],
-            "color": "#FED7AA"
-        },
-        {
-            "id": 29,
-            "letter": "گ",
-            "name": "Gaaf",
-            "english": "G",
-            "sound": "ga",
-            "words": [
-                {"word": "گل", "meaning": "Flower", "english": "Gul"},
-                {"word": "گھر", "meaning": "House", "english": "Ghar"},
-                {"word": "گائے", "meaning": "Cow", "english": "Gaye"}
-            ],
-            "color": "#FECACA"
-        },
-        {
-            "id": 30,
-            "letter": "ل",
-            "name": "Laam",
-            "english": "L",
-            "sound": "la",
-            "words": [
-                {"word": "لڑکا", "meaning": "Boy", "english": "Larka"},
-                {"word": "لہر", "meaning": "Wave", "english": "Lehar"},
-                {"word": "لیموں", "meaning": "Lemon", "english": "Lemon"}
-            ],
-            "color": "#F3E8FF"
-        },
-        {
-            "id": 31,
-            "letter": "م",
-            "name": "Meem",
-            "english": "M",
-            "sound": "ma",
-            "words": [
-                {"word": "ماں", "meaning": "Mother", "english": "Maa"},
-                {"word": "مکھی", "meaning": "Fly", "english": "Makhi"},
-                {"word": "مچھلی", "meaning": "Fish", "english": "Machli"}
-            ],
-            "color": "#E0E7FF"
-        },
-        {
-            "id": 32,
-            "letter": "ن",
-            "name": "Noon",
-            "english": "N",
-            "sound": "na",
-            "words": [
-                {"word": "ناک", "meaning": "Nose", "english": "Naak"},
-                {"word": "نیند", "meaning": "Sleep", "english": "Neend"},
-                {"word": "نیلا", "meaning": "Blue", "english": "Neela"}
-            ],
-            "color": "#C7D2FE"
-        },
-        {
-            "id": 33,
-            "letter": "ں",
-            "name": "Noon Ghunna",
-            "english": "N",
-            "sound": "n",
-            "words": [
-                {"word": "پیں", "meaning": "Drink", "english": "Piye"},
-                {"word": "میں", "meaning": "I/In", "english": "Main"}
-            ],
-            "color": "#A5B4FC"
-        },
-        {
-            "id": 34,
-            "letter": "و",
-            "name": "Waao",
-            "english": "W/V/O/U",
-            "sound": "wa",
-            "words": [
-                {"word": "والدین", "meaning": "Parents", "english": "Walidain"},
-                {"word": "ولی", "meaning": "Saint", "english": "Wali"},
-                {"word": "وقت", "meaning": "Time", "english": "Waqt"}
-            ],
-            "color": "#8B5CF6"
-        },
-        {
-            "id": 35,
-            "letter": "ہ",
-            "name": "Hay",
-            "english": "H",
-            "sound": "ha",
-            "words": [
-                {"word": "ہاتھ", "meaning": "Hand", "english": "Haath"},
-                {"word": "ہنسنا", "meaning": "To Laugh", "english": "Hansna"},
-                {"word": "ہوا", "meaning": "Air", "english": "Hawa"}
-            ],
-            "color": "#A855F7"
-        },
-        {
-            "id": 36,
-            "letter": "ھ",
-            "name": "Hay Dokhashmay",
-            "english": "H",
-            "sound": "h",
-            "words": [
-                {"word": "بھائی", "meaning": "Brother", "english": "Bhai"},
-                {"word": "گھوڑا", "meaning": "Horse", "english": "Ghora"}
-            ],
-            "color": "#9333EA"
-        },
-        {
-            "id": 37,
-            "letter": "ء",
-            "name": "Hamza",
-            "english": "'",
-            "sound": "",
-            "words": [
-                {"word": "آء", "meaning": "Come", "english": "Aa"},
-                {"word": "ماء", "meaning": "Water", "english": "Maa"}
-            ],
-            "color": "#7C3AED"
-        },
-        {
-            "id": 38,
-            "letter": "ی",
-            "name": "Yay",
-            "english": "Y/I/E",
-            "sound": "ya",
-            "words": [
-                {"word": "یہ", "meaning": "This", "english": "Yeh"},
-                {"word": "یار", "meaning": "Friend", "english": "Yaar"},
-                {"word": "یاد", "meaning": "Memory", "english": "Yaad"}
-            ],
-            "color": "#6366F1"
-        }
-    ]
-}
+            _render_autoplay_narration(ALPHABET_RECITAL_TEXT, lang="ur")
+
 
 # ===== GAMES AND ACTIVITIES =====
 GAMES_DATA = {
@@ -749,6 +274,10 @@ if 'current_letter_id' not in st.session_state:
 if 'game_state' not in st.session_state:
     st.session_state.game_state = {}
 
+# Script-run latencies by scope ("app" or a game fragment), served at /metrics
+run_metrics = get_run_metrics()
+ensure_metrics_server()
+
 # ===== HELPER FUNCTIONS =====
 
 def get_letter_by_id(letter_id):
@@ -759,31 +288,6 @@ def get_letter_by_id(letter_id):
     return None
 
 
-def create_letter_card(letter_data, is_learned=False):
-    """Create a beautiful letter card"""
-    status_emoji = "✅" if is_learned else "📚"
-
-    card_html = f"""
-    <div style="
-        background: linear-gradient(135deg, {letter_data['color']}20, {letter_data['color']}40);
-        border: 3px solid {letter_data['color']};
-        border-radius: 20px;
-        padding: 20px;
-        text-align: center;
-        margin: 10px;
-        box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-        transform: scale(1);
-        transition: transform 0.3s;
-    ">
-        <div style="font-size: 4em; margin-bottom: 10px;">{letter_data['letter']}</div>
-        <div style="font-size: 1.5em; font-weight: bold; margin-bottom: 5px;">{letter_data['name']}</div>
-        <div style="font-size: 1.2em; color: #666; margin-bottom: 10px;">"{letter_data['sound']}"</div>
-        <div style="font-size: 1.5em;">{status_emoji}</div>
-    </div>
-    """
-    return card_html
-
-
 def show_home_page():
     """Display the home page"""
     st.title("🌙 اردو حروف تہجی")
@@ -895,20 +399,13 @@ def show_letters_page():
     # Letter grid
     st.markdown("### حروف کا انتخاب کریں (Choose a letter to learn):")
 
-    # Display letters in rows of 5
-    letters = URDU_ALPHABET_DATA['letters']
-    for i in range(0, len(letters), 5):
-        cols = st.columns(5)
-        for j, letter in enumerate(letters[i:i+5]):
-            if j < len(cols):
-                with cols[j]:
-                    is_learned = letter['id'] in learned_letters
-                    st.markdown(create_letter_card(letter, is_learned), unsafe_allow_html=True)
-
-                    if st.button(f"سیکھیں (Learn)", key=f"learn_{letter['id']}"):
-                        st.session_state.current_letter_id = letter['id']
-                        st.session_state.current_page = "letter_detail"
-                        st.rerun()
+    # One cached component for all the cards; a click comes back as its value
+    clicked = letter_grid(learned_letters)
+    if clicked and clicked.get('at') != st.session_state.get('letter_grid_click'):
+        st.session_state.letter_grid_click = clicked['at']
+        st.session_state.current_letter_id = clicked['id']
+        st.session_state.current_page = "letter_detail"
+        st.rerun()
 
 
 def show_letter_detail_page():
@@ -942,18 +439,15 @@ def show_letter_detail_page():
 
     # Auto-play letter and its example words once when opening this detail page
     if st.session_state.get('auto_played_letter_id') != letter_data['id']:
-        audio_sequence = []
-        # letter first
-        audio_sequence.append(_tts_generate_audio_bytes(f"{letter_data['letter']}", lang="ur"))
-        # then words
-        for w in letter_data.get('words', [])[:3]:
-            audio_sequence.append(_tts_generate_audio_bytes(w['word'], lang="ur"))
+        # letter first, then words; synthesized concurrently, played in order
+        sequence_texts = [letter_data['letter']] + [w['word'] for w in letter_data.get('words', [])[:3]]
+        audio_sequence = synthesize_sequence(sequence_texts, lambda t: _tts_generate_audio_bytes(t, lang="ur"))
         _render_autoplay_sequence([a for a in audio_sequence if a], delay_ms_between=1400)
         st.session_state['auto_played_letter_id'] = letter_data['id']
 
     col1, col2 = st.columns(2)
     with col1:
-        create_voice_button(f"یہ حرف {letter_data['letter']} ہے۔", voice_id=f"letter_{letter_data['id']}")
+        create_voice_button(LETTER_PROMPT_TEMPLATE.format(letter=letter_data['letter']), voice_id=f"letter_{letter_data['id']}")
 
     with col2:
         # Speak first example word if available to ensure native Urdu sound
@@ -1027,30 +521,10 @@ def _reset_game_state(key: str):
         del st.session_state.game_state[key]
 
 
-def show_games_page():
-    """Display the games page"""
-    st.title("🎮 کھیل اور سرگرمیاں (Games & Activities)")
-    
-    # Auto guide once per session on games page load
-    if not st.session_state.get('games_guide_played'):
-        _render_autoplay_audio(_tts_generate_audio_bytes("اپنا پسندیدہ کھیل منتخب کریں اور مزے کریں۔", lang="ur"))
-        st.session_state['games_guide_played'] = True
-
-    # Navigation
-    col1, col2, col3 = st.columns([1, 2, 1])
-    with col1:
-        if st.button("🏠 گھر (Home)"):
-            st.session_state.current_page = "home"
-            st.rerun()
-
-    st.markdown("### کھیل کا انتخاب کریں (Choose a game):")
-
-    # Add guided practice section
-    st.markdown("---")
-    create_guided_practice_section()
-
-    # Letter Matching Game
-    with st.expander("🎯 حروف ملانا (Letter Matching Game)", expanded=True):
+@st.fragment
+def matching_game():
+    """Letter matching: pick a letter and its name."""
+    with run_metrics.timed("matching_game"):
         st.markdown("حروف کو ان کے ناموں سے ملائیں! (Match letters with their names!)")
 
         # Simple matching game
@@ -1106,12 +580,14 @@ def show_games_page():
 
             st.info(f"Score: {game_data['score']}/{len(game_data['letters'])}")
 
-        if st.button("نیا کھیل (New Game)"):
-            _reset_game_state('matching_game')
-            st.rerun()
+        # Reset in the click callback, so the fragment's own rerun draws the new game
+        st.button("نیا کھیل (New Game)", on_click=_reset_game_state, args=('matching_game',))
 
-    # Word Building Game
-    with st.expander("🔤 الفاظ بنانا (Word Building Game)"):
+
+@st.fragment
+def word_building_game():
+    """Word building: type a word from its scrambled letters."""
+    with run_metrics.timed("word_building_game"):
         st.markdown("حروف استعمال کر کے الفاظ بنائیں! (Build words using letters!)")
 
         # Simple word building with common words
@@ -1150,8 +626,11 @@ def show_games_page():
                 st.error("❌ دوبارہ کوشش کریں (Try again)")
                 st.info(f"صحیح لفظ: {target_word['word']}")
 
-    # NEW: Sound Game (Urdu audio -> pick the correct letter)
-    with st.expander("🔊 آواز پہچانو (Sound Game)"):
+
+@st.fragment
+def sound_game():
+    """Sound game: hear a letter and pick it."""
+    with run_metrics.timed("sound_game"):
         st.markdown("آواز سنیں اور صحیح حرف منتخب کریں! (Listen and choose the correct letter!)")
 
         if 'sound_game' not in st.session_state.game_state:
@@ -1170,10 +649,10 @@ def show_games_page():
         # Speak: "کون سا حرف ہے؟" then speak the letter itself
         if st.button("▶️ آواز چلائیں"):
             # autoplay a short prompt then the target letter
-            seq = [
-                _tts_generate_audio_bytes("یہ کون سا حرف ہے؟", lang="ur"),
-                _tts_generate_audio_bytes(f"{target_letter['letter']}", lang="ur"),
-            ]
+            seq = synthesize_sequence(
+                [SOUND_GAME_PROMPT, target_letter['letter']],
+                lambda t: _tts_generate_audio_bytes(t, lang="ur"),
+            )
             _render_autoplay_sequence(seq, delay_ms_between=900)
 
         options = [l['letter'] for l in sg['letters']]
@@ -1195,12 +674,13 @@ def show_games_page():
             else:
                 st.error("اُف! یہ غلط ہے۔ پھر کوشش کریں۔")
         st.info(f"اسکور: {sg['score']}")
-        if st.button("نیا دور (New Round)"):
-            _reset_game_state('sound_game')
-            st.rerun()
+        st.button("نیا دور (New Round)", on_click=_reset_game_state, args=('sound_game',))
 
-    # NEW: Find-the-letter Grid Game
-    with st.expander("🧩 حرف ڈھونڈیں (Find The Letter)"):
+
+@st.fragment
+def find_letter_game():
+    """Find-the-letter: click every copy of the target in a 4x4 grid."""
+    with run_metrics.timed("find_letter_game"):
         st.markdown("گریڈ میں نشان زدہ حرف ڈھونڈیں اور اس پر کلک کریں! (Find and click the target letter in the grid!)")
 
         if 'find_grid' not in st.session_state.game_state:
@@ -1242,10 +722,43 @@ def show_games_page():
                                 st.toast("اوہ! یہ نہیں۔", icon="❌")
 
         st.info(f"مل گئے: {len(fg['found_indices'])}/{fg['hits_needed']}")
-        if st.button("نیا گرڈ (New Grid)"):
-            _reset_game_state('find_grid')
+        st.button("نیا گرڈ (New Grid)", on_click=_reset_game_state, args=('find_grid',))
+
+
+def show_games_page():
+    """Display the games page"""
+    st.title("🎮 کھیل اور سرگرمیاں (Games & Activities)")
+    
+    # Auto guide once per session on games page load
+    if not st.session_state.get('games_guide_played'):
+        _render_autoplay_audio(_tts_generate_audio_bytes(GAMES_GUIDE_TEXT, lang="ur"))
+        st.session_state['games_guide_played'] = True
+
+    # Navigation
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("🏠 گھر (Home)"):
+            st.session_state.current_page = "home"
             st.rerun()
 
+    st.markdown("### کھیل کا انتخاب کریں (Choose a game):")
+
+    # Add guided practice section
+    st.markdown("---")
+    create_guided_practice_section()
+
+    with st.expander("🎯 حروف ملانا (Letter Matching Game)", expanded=True):
+        matching_game()
+
+    with st.expander("🔤 الفاظ بنانا (Word Building Game)"):
+        word_building_game()
+
+    with st.expander("🔊 آواز پہچانو (Sound Game)"):
+        sound_game()
+
+    with st.expander("🧩 حرف ڈھونڈیں (Find The Letter)"):
+        find_letter_game()
+
 
 def show_progress_page():
     """Display the progress page"""
@@ -1376,6 +889,9 @@ def show_progress_page():
 
 def main():
     """Main application logic"""
+    # Load the pre-rendered audio bundle up front so first clicks don't pay for it
+    get_primary_bundle()
+
     # Custom CSS for better Urdu text rendering
     st.markdown(
         """
@@ -1455,4 +971,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with run_metrics.timed("app", rerun="full"):
+        main()
\ No newline at end of file
@@ -0,0 +1,497 @@
+"""
+Urdu alphabet dataset and fixed voice prompts shared by the Urdu apps.
+
+Kept free of Streamlit imports so build steps and the tutor bot can use the
+data without executing an app script.
+"""
+
+# ===== URDU ALPHABET DATA =====
+URDU_ALPHABET_DATA = {
+    "letters": [
+        {
+            "id": 1,
+            "letter": "ا",
+            "name": "Alif",
+            "english": "A",
+            "sound": "aa",
+            "words": [
+                {"word": "آم", "meaning": "Mango", "english": "Aam"},
+                {"word": "آنکھ", "meaning": "Eye", "english": "Aankh"},
+                {"word": "اسکول", "meaning": "School", "english": "School"}
+            ],
+            "color": "#FF6B6B"
+        },
+        {
+            "id": 2,
+            "letter": "ب",
+            "name": "Bay",
+            "english": "B",
+            "sound": "ba",
+            "words": [
+                {"word": "بلی", "meaning": "Cat", "english": "Billi"},
+                {"word": "بکری", "meaning": "Goat", "english": "Bakri"},
+                {"word": "بندر", "meaning": "Monkey", "english": "Bandar"}
+            ],
+            "color": "#4ECDC4"
+        },
+        {
+            "id": 3,
+            "letter": "پ",
+            "name": "Pay",
+            "english": "P",
+            "sound": "pa",
+            "words": [
+                {"word": "پانی", "meaning": "Water", "english": "Paani"},
+                {"word": "پھل", "meaning": "Fruit", "english": "Phal"},
+                {"word": "پرندہ", "meaning": "Bird", "english": "Parinda"}
+            ],
+            "color": "#45B7D1"
+        },
+        {
+            "id": 4,
+            "letter": "ت",
+            "name": "Tay",
+            "english": "T",
+            "sound": "ta",
+            "words": [
+                {"word": "تتلی", "meaning": "Butterfly", "english": "Titli"},
+                {"word": "تیرنا", "meaning": "Swimming", "english": "Tairna"},
+                {"word": "تارا", "meaning": "Star", "english": "Tara"}
+            ],
+            "color": "#96CEB4"
+        },
+        {
+            "id": 5,
+            "letter": "ٹ",
+            "name": "Ttay",
+            "english": "Tt",
+            "sound": "tta",
+            "words": [
+                {"word": "ٹماٹر", "meaning": "Tomato", "english": "Tamatar"},
+                {"word": "ٹوپی", "meaning": "Hat", "english": "Topi"},
+                {"word": "ٹرین", "meaning": "Train", "english": "Train"}
+            ],
+            "color": "#FFEAA7"
+        },
+        {
+            "id": 6,
+            "letter": "ث",
+            "name": "Say",
+            "english": "S",
+            "sound": "sa",
+            "words": [
+                {"word": "ثعبان", "meaning": "Snake", "english": "Saaban"},
+                {"word": "ثواب", "meaning": "Reward", "english": "Sawab"}
+            ],
+            "color": "#DDA0DD"
+        },
+        {
+            "id": 7,
+            "letter": "ج",
+            "name": "Jeem",
+            "english": "J",
+            "sound": "ja",
+            "words": [
+                {"word": "جہاز", "meaning": "Ship/Plane", "english": "Jahaaz"},
+                {"word": "جانور", "meaning": "Animal", "english": "Janwar"},
+                {"word": "جوتا", "meaning": "Shoe", "english": "Joota"}
+            ],
+            "color": "#FFB347"
+        },
+        {
+            "id": 8,
+            "letter": "چ",
+            "name": "Chay",
+            "english": "Ch",
+            "sound": "cha",
+            "words": [
+                {"word": "چاند", "meaning": "Moon", "english": "Chaand"},
+                {"word": "چائے", "meaning": "Tea", "english": "Chai"},
+                {"word": "چڑیا", "meaning": "Sparrow", "english": "Chiriya"}
+            ],
+            "color": "#FF69B4"
+        },
+        {
+            "id": 9,
+            "letter": "ح",
+            "name": "Hay",
+            "english": "H",
+            "sound": "ha",
+            "words": [
+                {"word": "حج", "meaning": "Pilgrimage", "english": "Hajj"},
+                {"word": "حساب", "meaning": "Math", "english": "Hisaab"}
+            ],
+            "color": "#87CEEB"
+        },
+        {
+            "id": 10,
+            "letter": "خ",
+            "name": "Khay",
+            "english": "Kh",
+            "sound": "kha",
+            "words": [
+                {"word": "خرگوش", "meaning": "Rabbit", "english": "Khargosh"},
+                {"word": "خوشی", "meaning": "Happiness", "english": "Khushi"},
+                {"word": "خواب", "meaning": "Dream", "english": "Khwab"}
+            ],
+            "color": "#98FB98"
+        },
+        {
+            "id": 11,
+            "letter": "د",
+            "name": "Daal",
+            "english": "D",
+            "sound": "da",
+            "words": [
+                {"word": "دودھ", "meaning": "Milk", "english": "Doodh"},
+                {"word": "درخت", "meaning": "Tree", "english": "Darakht"},
+                {"word": "دل", "meaning": "Heart", "english": "Dil"}
+            ],
+            "color": "#FF8C94"
+        },
+        {
+            "id": 12,
+            "letter": "ڈ",
+            "name": "Ddaal",
+            "english": "Dd",
+            "sound": "dda",
+            "words": [
+                {"word": "ڈبہ", "meaning": "Box", "english": "Dabba"},
+                {"word": "ڈاکٹر", "meaning": "Doctor", "english": "Doctor"}
+            ],
+            "color": "#A8E6CF"
+        },
+        {
+            "id": 13,
+            "letter": "ذ",
+            "name": "Zaal",
+            "english": "Z",
+            "sound": "za",
+            "words": [
+                {"word": "ذہن", "meaning": "Mind", "english": "Zehan"},
+                {"word": "ذخم", "meaning": "Wound", "english": "Zakham"}
+            ],
+            "color": "#FFD3A5"
+        },
+        {
+            "id": 14,
+            "letter": "ر",
+            "name": "Ray",
+            "english": "R",
+            "sound": "ra",
+            "words": [
+                {"word": "روٹی", "meaning": "Bread", "english": "Roti"},
+                {"word": "رنگ", "meaning": "Color", "english": "Rang"},
+                {"word": "راجا", "meaning": "King", "english": "Raja"}
+            ],
+            "color": "#B8A9C9"
+        },
+        {
+            "id": 15,
+            "letter": "ڑ",
+            "name": "Rray",
+            "english": "Rr",
+            "sound": "rra",
+            "words": [
+                {"word": "کڑک", "meaning": "Thunder", "english": "Karak"},
+                {"word": "پڑھنا", "meaning": "To Read", "english": "Parhna"}
+            ],
+            "color": "#C7CEEA"
+        },
+        {
+            "id": 16,
+            "letter": "ز",
+            "name": "Zay",
+            "english": "Z",
+            "sound": "za",
+            "words": [
+                {"word": "زرافہ", "meaning": "Giraffe", "english": "Zarafa"},
+                {"word": "زمین", "meaning": "Earth", "english": "Zameen"},
+                {"word": "زندگی", "meaning": "Life", "english": "Zindagi"}
+            ],
+            "color": "#F38BA8"
+        },
+        {
+            "id": 17,
+            "letter": "ژ",
+            "name": "Zhay",
+            "english": "Zh",
+            "sound": "zha",
+            "words": [
+                {"word": "ژالہ", "meaning": "Dew", "english": "Zhala"}
+            ],
+            "color": "#FAB795"
+        },
+        {
+            "id": 18,
+            "letter": "س",
+            "name": "Seen",
+            "english": "S",
+            "sound": "sa",
+            "words": [
+                {"word": "سورج", "meaning": "Sun", "english": "Suraj"},
+                {"word": "سیب", "meaning": "Apple", "english": "Seb"},
+                {"word": "سمندر", "meaning": "Ocean", "english": "Samundar"}
+            ],
+            "color": "#79C99E"
+        },
+        {
+            "id": 19,
+            "letter": "ش",
+            "name": "Sheen",
+            "english": "Sh",
+            "sound": "sha",
+            "words": [
+                {"word": "شیر", "meaning": "Lion", "english": "Sher"},
+                {"word": "شہد", "meaning": "Honey", "english": "Shahad"},
+                {"word": "شہر", "meaning": "City", "english": "Shehar"}
+            ],
+            "color": "#A8DADC"
+        },
+        {
+            "id": 20,
+            "letter": "ص",
+            "name": "Swaad",
+            "english": "S",
+            "sound": "sa",
+            "words": [
+                {"word": "صابن", "meaning": "Soap", "english": "Sabun"},
+                {"word": "صفر", "meaning": "Zero", "english": "Sifar"}
+            ],
+            "color": "#F1C0E8"
+        },
+        {
+            "id": 21,
+            "letter": "ض",
+            "name": "Zwaad",
+            "english": "Z",
+            "sound": "za",
+            "words": [
+                {"word": "ضرور", "meaning": "Surely", "english": "Zaroor"}
+            ],
+            "color": "#CFBAF0"
+        },
+        {
+            "id": 22,
+            "letter": "ط",
+            "name": "Toay",
+            "english": "T",
+            "sound": "ta",
+            "words": [
+                {"word": "طوطا", "meaning": "Parrot", "english": "Tota"},
+                {"word": "طالب", "meaning": "Student", "english": "Talib"}
+            ],
+            "color": "#A3C4F3"
+        },
+        {
+            "id": 23,
+            "letter": "ظ",
+            "name": "Zoay",
+            "english": "Z",
+            "sound": "za",
+            "words": [
+                {"word": "ظہر", "meaning": "Noon", "english": "Zuhar"}
+            ],
+            "color": "#90DBF4"
+        },
+        {
+            "id": 24,
+            "letter": "ع",
+            "name": "Ain",
+            "english": "A",
+            "sound": "aa",
+            "words": [
+                {"word": "عقل", "meaning": "Wisdom", "english": "Aql"},
+                {"word": "عید", "meaning": "Festival", "english": "Eid"}
+            ],
+            "color": "#8EECF5"
+        },
+        {
+            "id": 25,
+            "letter": "غ",
+            "name": "Ghain",
+            "english": "Gh",
+            "sound": "gha",
+            "words": [
+                {"word": "غذا", "meaning": "Food", "english": "Ghaza"},
+                {"word": "غم", "meaning": "Sadness", "english": "Gham"}
+            ],
+            "color": "#98F5E1"
+        },
+        {
+            "id": 26,
+            "letter": "ف",
+            "name": "Fay",
+            "english": "F",
+            "sound": "fa",
+            "words": [
+                {"word": "فیل", "meaning": "Elephant", "english": "Feel"},
+                {"word": "فول", "meaning": "Beans", "english": "Phool"},
+                {"word": "فرشتہ", "meaning": "Angel", "english": "Farishta"}
+            ],
+            "color": "#B9FBC0"
+        },
+        {
+            "id": 27,
+            "letter": "ق",
+            "name": "Qaaf",
+            "english": "Q",
+            "sound": "qa",
+            "words": [
+                {"word": "قلم", "meaning": "Pen", "english": "Qalam"},
+                {"word": "قرآن", "meaning": "Quran", "english": "Quran"}
+            ],
+            "color": "#FDE68A"
+        },
+        {
+            "id": 28,
+            "letter": "ک",
+            "name": "Kaaf",
+            "english": "K",
+            "sound": "ka",
+            "words": [
+                {"word": "کتاب", "meaning": "Book", "english": "Kitab"},
+                {"word": "کیلا", "meaning": "Banana", "english": "Kela"},
+                {"word": "کبوتر", "meaning": "Pigeon", "english": "Kabootar"}
+            ],
+            "color": "#FED7AA"
+        },
+        {
+            "id": 29,
+            "letter": "گ",
+            "name": "Gaaf",
+            "english": "G",
+            "sound": "ga",
+            "words": [
+                {"word": "گل", "meaning": "Flower", "english": "Gul"},
+                {"word": "گھر", "meaning": "House", "english": "Ghar"},
+                {"word": "گائے", "meaning": "Cow", "english": "Gaye"}
+            ],
+            "color": "#FECACA"
+        },
+        {
+            "id": 30,
+            "letter": "ل",
+            "name": "Laam",
+            "english": "L",
+            "sound": "la",
+            "words": [
+                {"word": "لڑکا", "meaning": "Boy", "english": "Larka"},
+                {"word": "لہر", "meaning": "Wave", "english": "Lehar"},
+                {"word": "لیموں", "meaning": "Lemon", "english": "Lemon"}
+            ],
+            "color": "#F3E8FF"
+        },
+        {
+            "id": 31,
+            "letter": "م",
+            "name": "Meem",
+            "english": "M",
+            "sound": "ma",
+            "words": [
+                {"word": "ماں", "meaning": "Mother", "english": "Maa"},
+                {"word": "مکھی", "meaning": "Fly", "english": "Makhi"},
+                {"word": "مچھلی", "meaning": "Fish", "english": "Machli"}
+            ],
+            "color": "#E0E7FF"
+        },
+        {
+            "id": 32,
+            "letter": "ن",
+            "name": "Noon",
+            "english": "N",
+            "sound": "na",
+            "words": [
+                {"word": "ناک", "meaning": "Nose", "english": "Naak"},
+                {"word": "نیند", "meaning": "Sleep", "english": "Neend"},
+                {"word": "نیلا", "meaning": "Blue", "english": "Neela"}
+            ],
+            "color": "#C7D2FE"
+        },
+        {
+            "id": 33,
+            "letter": "ں",
+            "name": "Noon Ghunna",
+            "english": "N",
+            "sound": "n",
+            "words": [
+                {"word": "پیں", "meaning": "Drink", "english": "Piye"},
+                {"word": "میں", "meaning": "I/In", "english": "Main"}
+            ],
+            "color": "#A5B4FC"
+        },
+        {
+            "id": 34,
+            "letter": "و",
+            "name": "Waao",
+            "english": "W/V/O/U",
+            "sound": "wa",
+            "words": [
+                {"word": "والدین", "meaning": "Parents", "english": "Walidain"},
+                {"word": "ولی", "meaning": "Saint", "english": "Wali"},
+                {"word": "وقت", "meaning": "Time", "english": "Waqt"}
+            ],
+            "color": "#8B5CF6"
+        },
+        {
+            "id": 35,
+            "letter": "ہ",
+            "name": "Hay",
+            "english": "H",
+            "sound": "ha",
+            "words": [
+                {"word": "ہاتھ", "meaning": "Hand", "english": "Haath"},
+                {"word": "ہنسنا", "meaning": "To Laugh", "english": "Hansna"},
+                {"word": "ہوا", "meaning": "Air", "english": "Hawa"}
+            ],
+            "color": "#A855F7"
+        },
+        {
+            "id": 36,
+            "letter": "ھ",
+            "name": "Hay Dokhashmay",
+            "english": "H",
+            "sound": "h",
+            "words": [
+                {"word": "بھائی", "meaning": "Brother", "english": "Bhai"},
+                {"word": "گھوڑا", "meaning": "Horse", "english": "Ghora"}
+            ],
+            "color": "#9333EA"
+        },
+        {
+            "id": 37,
+            "letter": "ء",
+            "name": "Hamza",
+            "english": "'",
+            "sound": "",
+            "words": [
+                {"word": "آء", "meaning": "Come", "english": "Aa"},
+                {"word": "ماء", "meaning": "Water", "english": "Maa"}
+            ],
+            "color": "#7C3AED"
+        },
+        {
+            "id": 38,
+            "letter": "ی",
+            "name": "Yay",
+            "english": "Y/I/E",
+            "sound": "ya",
+            "words": [
+                {"word": "یہ", "meaning": "This", "english": "Yeh"},
+                {"word": "یار", "meaning": "Friend", "english": "Yaar"},
+                {"word": "یاد", "meaning": "Memory", "english": "Yaad"}
+            ],
+            "color": "#6366F1"
+        }
+    ]
+}
+
+
+# ===== FIXED VOICE PROMPTS =====
+GUIDED_PRACTICE_TEXT = "آئیے مل کر اردو حروف کی مشق کرتے ہیں۔ غور سے سنیں اور میرے بعد دہرائیں۔"
+ALPHABET_RECITAL_TEXT = (
+    "اب میں مکمل اردو حروف پڑھوں گا: الف، بے، پے، تے، ٹے، ثے، جیم، چے، حے، خے، دال، ڈال، ذال، رے، ڑے، زے، ژے، سین، شین، صاد، ضاد، طے، ظے، عین، غین، فے، قاف، کاف، گاف، لام، میم، نون، نون غنہ، واؤ، ہے، ھے دو چشمی، ہمزہ، یے"
+)
+GAMES_GUIDE_TEXT = "اپنا پسندیدہ کھیل منتخب کریں اور مزے کریں۔"
+SOUND_GAME_PROMPT = "یہ کون سا حرف ہے؟"
+LETTER_PROMPT_TEMPLATE = "یہ حرف {letter} ہے۔"
@@ -1,123 +1,148 @@
 import streamlit as st
 from audio_recorder_streamlit import audio_recorder
 from dotenv import load_dotenv
-import os
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
-from langchain.memory import ConversationBufferMemory
 from langchain.chains import ConversationChain
-from gtts import gTTS
-import base64
-from io import BytesIO
 import asyncio
 import streamlit.components.v1 as components
-from openai import OpenAI
-import re
+import time
+import uuid
+from audio_playback import ClipSequence, autoplay_audio
+from audio_server import (
+    NARRATION_GAP_MS, _content_type, ensure_audio_server, load_audio, open_live_stream, publish_audio, store_audio
+)
+from audio_bundle import bundled_audio
+from outbound import current_session, get_scheduler
+from audio_sequence import SentenceBuffer, stitch_mp3_cached, submit_synthesis
+from single_flight import get_single_flight
+from speech_input import prepare_for_whisper
+from tts_engines import get_tts_chain
+from tutor_cache import get_response_cache
+from tutor_clients import get_chat_llm, get_openai_client, get_tutor_prompt
+from tutor_intents import context_key, detect_letter, normalize_intent
+from tutor_memory import LessonMemory, count_tokens
+from tutor_metrics import TurnTrace, ensure_metrics_server
+from tutor_prefetch import get_prefetcher
+from tutor_router import answer_from_dataset
+from tutor_styling import StreamingStyler, UpdateThrottle, style_response
 
 # Load environment variables
 load_dotenv()
 
-# Initialize OpenAI LLM with streaming enabled
-llm = ChatOpenAI(
-    model="gpt-3.5-turbo",
-    temperature=0.7,
-    openai_api_key=os.getenv("OPENAI_API_KEY"),
-    streaming=True
-)
-
-# Define the system prompt for a kid-friendly Urdu letter tutor
-system_template = """
-You are a 5-year-old Urdu letter tutor teaching 5-year-old children. Speak like a playful 5-year-old friend in simple, fun Urdu. Follow these instructions exactly:
-
-- Accept questions in mixed English and Urdu, like "What is ا?" or "ب kya hai?", but always respond only in simple, pure Urdu.
-- Teach Urdu letters in a fun, story-like way to make learning exciting.
-- For every letter, include one short example word using animals, fruits, or toys, like "ا آم کی ہے!".
-- Clearly state the letter and the example word in each response so they can be shown in big, bold text.
-- Never use difficult words; keep language very simple for 5-year-olds.
-- Keep responses to one or two short sentences.
-- Talk like a 5-year-old, using playful phrases like "واہ، ا بہت مزے کا ہے!".
-- Remember which letters the child has learned and suggest the next letter, like "ا سیکھ لیا؟ اب ب سیکھیں!".
-- If a question is not about letters, gently say, "آؤ، حروف سیکھیں!".
-- End every answer with a fun question, like "پرندے کا حرف سیکھیں؟".
-- Avoid any inappropriate content, such as violence, complex ideas, or anything not suitable for 5-year-olds.
-"""
-
-# Set up the prompt template with history and input variables
-prompt = ChatPromptTemplate.from_messages([
-    SystemMessagePromptTemplate.from_template(system_template),
-    HumanMessagePromptTemplate.from_template("{history}\n{input}")
-])
-
-# Initialize session state for conversation memory and cache
+# Initialize session state for conversation memory. The history sent to the
+# LLM is a bounded window of recent turns plus the letters already learned,
+# so long sessions cost the same per turn as short ones.
 if "memory" not in st.session_state:
-    st.session_state.memory = ConversationBufferMemory(return_messages=True)
+    st.session_state.memory = LessonMemory()
 if "messages" not in st.session_state:
     st.session_state.messages = []
-if "response_cache" not in st.session_state:
-    st.session_state.response_cache = {}
-
-# Create the conversation chain
-conversation = ConversationChain(
-    llm=llm,
-    prompt=prompt,
-    memory=st.session_state.memory,
-    input_key="input"
-)
+if "turn_stats" not in st.session_state:
+    st.session_state.turn_stats = []
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+# Outbound API calls made during this run are queued fairly per session
+current_session.set(st.session_state.session_id)
+scheduler = get_scheduler()
+# This worker's turn metrics, scrapeable at /metrics
+ensure_metrics_server()
+
+# Answers are shared by every session and worker, keyed by normalized intent
+# and the conversation history they were generated from
+response_cache = get_response_cache()
+llm_flights = get_single_flight("llm")
+prefetcher = get_prefetcher()
+
+# Bind this session's memory to the process-wide LLM and prompt once per
+# session instead of rebuilding the client and chain on every rerun
+if "conversation" not in st.session_state:
+    st.session_state.conversation = ConversationChain(
+        llm=get_chat_llm(),
+        prompt=get_tutor_prompt(),
+        memory=st.session_state.memory,
+        input_key="input"
+    )
+conversation = st.session_state.conversation
+
+# Stream the reply token by token. ConversationChain.stream() only yields the
+# finished answer, so drive the chain's prompt, memory and LLM directly.
+def stream_response(input_text, history, cache_key, trace):
+    messages = conversation.prompt.format_messages(history=history, input=input_text)
+    # Record the prompt size for this turn
+    trace.set(
+        prompt_tokens=sum(count_tokens(message.content) for message in messages),
+        history_tokens=count_tokens(history),
+        turns_in_window=len(conversation.memory.turns),
+    )
+    started = time.perf_counter()
+    # Sessions asking the same question from the same history at the same
+    # moment share one LLM stream instead of each sending the request
+    chunks = llm_flights.stream(cache_key, lambda: (
+        chunk.content for chunk in scheduler.stream("llm", lambda: conversation.llm.stream(messages))
+    ))
+    response_text = ""
+    for chunk in chunks:
+        if not response_text and chunk:
+            trace.set(ttft_ms=trace.elapsed_ms(started))
+        response_text += chunk
+        yield chunk
+    trace.set(stream_ms=trace.elapsed_ms(started), completion_tokens=count_tokens(response_text))
+    conversation.memory.save_context({"input": input_text}, {"response": response_text})
 
 # Asynchronous function to convert text to speech
 async def async_text_to_speech(text):
     loop = asyncio.get_event_loop()
     def generate_audio():
-        tts = gTTS(text=text, lang='ur')
-        audio_bytes = BytesIO()
-        tts.write_to_fp(audio_bytes)
-        audio_bytes.seek(0)
-        return base64.b64encode(audio_bytes.read()).decode('utf-8')
+        return get_tts_chain().synthesize(text, lang='ur')
     return await loop.run_in_executor(None, generate_audio)
 
 # Synchronous function for Whisper transcription
-def transcribe_audio(audio_file_path, api_key):
+# The recording stays in memory and is shrunk to 16 kHz mono speech first
+def transcribe_audio(audio_bytes, trace):
+    upload = prepare_for_whisper(audio_bytes)
+    if upload is None:
+        raise Exception("no speech detected")
+    trace.set(recorded_bytes=len(audio_bytes), upload_bytes=len(upload[1]))
     try:
-        client = OpenAI(api_key=api_key)
-        with open(audio_file_path, "rb") as audio_file:
-            transcript = client.audio.transcriptions.create(
+        with trace.timed("transcribe_ms"):
+            transcript = scheduler.call(
+                "whisper",
+                get_openai_client().audio.transcriptions.create,
                 model="whisper-1",
-                file=audio_file,
+                file=upload,
                 language="ur"
             )
-        return transcript.text
     except Exception as e:
         raise Exception(f"Whisper transcription failed: {str(e)}")
+    return transcript.text
+
+# Log and record a finished turn, keeping the last few for the sidebar
+def finish_turn(trace, error=None):
+    st.session_state.turn_stats.append(trace.finish(error))
+    del st.session_state.turn_stats[:-20]
+
+# Auto-play a reply without showing a player; the clip is fetched by its
+# content hash from the app's media endpoint (or the audio endpoint, if on)
+def play_audio(audio_mp3):
+    autoplay_audio(audio_mp3)
 
-# Custom HTML for auto-playing audio with fallback
-def play_audio(audio_base64):
+# Lazy, on-demand player for past replies: only the clip's URL goes to the
+# browser, and nothing downloads or plays until the child presses play
+# (replies voiced by a local engine may be WAV or Ogg rather than MP3)
+def audio_player(audio_mp3):
+    if ensure_audio_server():
+        st.audio(publish_audio(audio_mp3), format=_content_type(audio_mp3))
+    else:
+        # Streamlit's media endpoint serves the bytes by hash instead
+        st.audio(audio_mp3, format=_content_type(audio_mp3))
+
+def play_audio_src(src, content_type):
     audio_html = f"""
     <audio autoplay>
-        <source src="data:audio/mp3;base64,{audio_base64}" type="audio/mp3">
+        <source src="{src}" type="{content_type}">
         Your browser does not support the audio element.
     </audio>
     """
     components.html(audio_html, height=0)
 
-# Function to style the letter and example word in big, bold text
-def style_response(response_text):
-    # Find the letter and example word using regex (assuming single Urdu letter and a word)
-    letter_match = re.search(r'[ا-ے]', response_text)
-    word_match = re.search(r'\b(?!آؤ|سیکھیں|ہیلو|واہ|مزے|کیا|ہائیں|پرندے|حرف|اب|بہت)\w+\b', response_text)
-    
-    letter = letter_match.group(0) if letter_match else ""
-    word = word_match.group(0) if word_match else ""
-    
-    # Style the letter and word in big, bold text
-    if letter and word:
-        styled_response = response_text.replace(
-            letter, f"<span style='font-size: 32px; font-weight: bold;'>{letter}</span>"
-        ).replace(
-            word, f"<span style='font-size: 28px; font-weight: bold;'>{word}</span>"
-        )
-        return styled_response
-    return response_text
-
 # Streamlit app
 st.title("بچوں کے لیے اردو حروف ٹیوٹر")
 st.write("ہیلو! میں تمہارا 5 سال کا اردو حروف کا ٹیچر ہوں! مجھ سے حروف کے بارے میں پوچھو، جیسے 'ا کیا ہے؟' یا 'What is ب?' بول کر یا ٹائپ کر کے پوچھو۔ آؤ، سیکھیں!")
@@ -128,8 +153,9 @@ for message in st.session_state.messages:
     with st.chat_message(message["role"]):
         if message["role"] == "assistant":
             st.markdown(style_response(message["content"]), unsafe_allow_html=True)
-            if "audio" in message:
-                play_audio(message["audio"])
+            # Each clip autoplayed once when its reply arrived; don't resend or replay it
+            if message.get("audio"):
+                audio_player(message["audio"])
         else:
             st.markdown(message["content"])
 
@@ -150,25 +176,21 @@ user_input = st.chat_input("یا یہاں سوال ٹائپ کرو")
 
 # Process input (voice or text)
 input_text = None
+trace = None
 if audio_bytes:
+    trace = TurnTrace(st.session_state.session_id, source="voice")
     with st.spinner("تمہاری بات سن رہا ہوں"):
-        # Save audio to temporary file
-        temp_file = "temp_audio.wav"
         try:
-            with open(temp_file, "wb") as f:
-                f.write(audio_bytes)
             # Use OpenAI Whisper for transcription
-            input_text = transcribe_audio(temp_file, os.getenv("OPENAI_API_KEY"))
+            input_text = transcribe_audio(audio_bytes, trace)
             st.session_state.messages.append({"role": "user", "content": input_text})
             with st.chat_message("user"):
                 st.markdown(input_text)
-            os.remove(temp_file)
         except Exception as e:
+            finish_turn(trace, error=e)
             st.error(f"معاف کرو، سمجھ نہ سکا: {str(e)}۔ براہ کرم دوبارہ بولنے کی کوشش کریں یا سوال ٹائپ کریں۔")
-        finally:
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
 elif user_input:
+    trace = TurnTrace(st.session_state.session_id, source="text")
     input_text = user_input
     st.session_state.messages.append({"role": "user", "content": input_text})
     with st.chat_message("user"):
@@ -177,34 +199,157 @@ elif user_input:
 # Process bot response
 if input_text:
     try:
-        # Check cache for response
-        cache_key = input_text.lower().strip()
-        if cache_key in st.session_state.response_cache:
-            response, audio_base64 = st.session_state.response_cache[cache_key]
+        # Single-letter questions are answered straight from the alphabet data,
+        # with pre-rendered audio; only open-ended ones reach the cache and LLM
+        response = answer_from_dataset(input_text)
+        audio_ref = ""
+        trace.set(path="dataset")
+        if response is None:
+            # Open-ended answers depend on the lesson so far, so only a child
+            # with the same history can reuse or share one
+            history = conversation.memory.load_memory_variables({})["history"]
+            cache_key = context_key(normalize_intent(input_text), history)
+            cached = response_cache.get(cache_key)
+            trace.set(path="cache" if cached else "llm", response_cache="hit" if cached else "miss")
+            if cached:
+                response, audio_ref = cached
+        if response:
+            # The clip may have been evicted from the audio cache; re-voice it
+            with trace.timed("tts_ms"):
+                response_audio = (load_audio(audio_ref) or bundled_audio(response)
+                                  or asyncio.run(async_text_to_speech(response)))
+            # Keep the chain's memory in step so "next letter" suggestions still work
+            conversation.memory.save_context({"input": input_text}, {"response": response})
             with st.chat_message("assistant"):
                 st.markdown(style_response(response), unsafe_allow_html=True)
-                play_audio(audio_base64)
+                play_audio(response_audio)
+            st.session_state.messages.append({
+                "role": "assistant",
+                "content": response,
+                "audio": response_audio
+            })
         else:
-            # Stream response
+            # Stream response, sending each finished sentence to TTS while
+            # later tokens are still arriving
             response_container = st.chat_message("assistant")
             response_text = ""
-            with response_container:
-                response_placeholder = st.empty()
-                for chunk in conversation.stream(input_text):
-                    response_text += chunk.get("response", "")
-                    response_placeholder.markdown(style_response(response_text), unsafe_allow_html=True)
-            # Generate audio asynchronously
-            with st.spinner("آواز بنا رہا ہوں"):
-                audio_base64 = asyncio.run(async_text_to_speech(response_text))
+            sentences = SentenceBuffer()
+            clip_futures = []
+            # Sentence clips play as they are synthesized: over the audio
+            # endpoint's live stream when it runs, otherwise one by one in the page
+            live_stream = open_live_stream()
+            tts_chain = get_tts_chain()
+
+            def speak(sentence):
+                future = submit_synthesis(tts_chain.synthesize, sentence, "ur")
+                clip_futures.append(future)
+                if live_stream:
+                    live_stream.add(future)
+                else:
+                    player.add(future)
+
+            try:
+                with response_container:
+                    if live_stream:
+                        # Starts playing as soon as the first sentence is voiced (live
+                        # streams are stitched MP3 frames, whatever the engine)
+                        play_audio_src(live_stream.url, "audio/mpeg")
+                    else:
+                        player = ClipSequence(gap_ms=NARRATION_GAP_MS)
+                    # While streaming, each finished sentence is styled once into its
+                    # own block and only the sentence being written is re-rendered,
+                    # at most once per flush interval
+                    response_placeholder = st.empty()
+                    segment_box = response_placeholder.container()
+                    tail_slot = segment_box.empty()
+                    styler = StreamingStyler()
+                    throttle = UpdateThrottle()
+                    ui_updates = 0
+                    stream_chunks = 0
+                    for chunk in stream_response(input_text, history, cache_key, trace):
+                        response_text += chunk
+                        stream_chunks += 1
+                        segments = styler.feed(chunk)
+                        for segment in segments:
+                            tail_slot.markdown(styler.style(segment), unsafe_allow_html=True)
+                            tail_slot = segment_box.empty()
+                            ui_updates += 1
+                        if styler.tail and throttle.due():
+                            tail_slot.markdown(styler.style_tail(), unsafe_allow_html=True)
+                            ui_updates += 1
+                        for sentence in sentences.feed(chunk):
+                            speak(sentence)
+                        if not live_stream:
+                            player.poll()
+                    for sentence in sentences.flush():
+                        speak(sentence)
+                    # One final block, identical to how the answer shows in history
+                    styler.finish()
+                    response_placeholder.markdown(styler.style(response_text), unsafe_allow_html=True)
+                    # Chunks received vs. redraws sent to the browser
+                    trace.set(stream_chunks=stream_chunks, ui_updates=ui_updates + 1)
+            finally:
+                # A failed stream must still end the browser's live request
+                if live_stream:
+                    live_stream.close()
+            # Collect the sentence clips into one track for the cache and history.
+            # tts_ms is the TTS time left over once the text finished streaming.
+            with st.spinner("آواز بنا رہا ہوں"), trace.timed("tts_ms"):
+                clips = [future.result() for future in clip_futures]
+                response_audio = stitch_mp3_cached(clips, gap_ms=NARRATION_GAP_MS) or asyncio.run(async_text_to_speech(response_text))
             # Cache response
-            st.session_state.response_cache[cache_key] = (response_text, audio_base64)
-            # Auto-play audio
-            play_audio(audio_base64)
+            response_cache.put(cache_key, response_text, store_audio(response_audio) if response_audio else "")
+            # Auto-play audio unless the sentences already played (the live
+            # stream stays silent when every clip failed or none was MP3)
+            if live_stream:
+                played = live_stream.played()
+            else:
+                player.drain()
+                played = player.played
+            if not played:
+                play_audio(response_audio)
             # Store in session state
             st.session_state.messages.append({
                 "role": "assistant",
                 "content": response_text,
-                "audio": audio_base64
+                "audio": response_audio
             })
+        # The answer points the child at the next letter; voice that lesson in
+        # the background so the follow-up plays straight from cache
+        asked_letter = detect_letter(input_text)
+        if asked_letter:
+            prefetcher.schedule(st.session_state.session_id, asked_letter)
+        else:
+            prefetcher.cancel(st.session_state.session_id)
+        trace.set(audio_bytes=len(response_audio or b""))
+        finish_turn(trace)
     except Exception as e:
-        st.error(f"معاف کرو، کچھ غلط ہو گیا: {str(e)}")
\ No newline at end of file
+        finish_turn(trace, error=e)
+        st.error(f"معاف کرو، کچھ غلط ہو گیا: {str(e)}")
+
+# Prompt size per turn, so growth over a long session is visible
+llm_turns = [turn for turn in st.session_state.turn_stats if "prompt_tokens" in turn]
+if llm_turns:
+    last = llm_turns[-1]
+    st.sidebar.caption(
+        f"Prompt: {last['prompt_tokens']} tokens "
+        f"(history {last['history_tokens']}, {last['turns_in_window']} turns; "
+        f"letters learned: {len(st.session_state.memory.letters_learned)})"
+    )
+voice_turns = [turn for turn in st.session_state.turn_stats if "transcribe_ms" in turn]
+if voice_turns:
+    last = voice_turns[-1]
+    st.sidebar.caption(
+        f"Voice upload: {last['upload_bytes'] / 1024:.0f} KiB "
+        f"(recorded {last['recorded_bytes'] / 1024:.0f} KiB), "
+        f"transcribed in {last['transcribe_ms']:.0f} ms"
+    )
+llm_coalesced = llm_flights.stats()["coalesced"]
+tts_coalesced = get_tts_chain().flights.stats()["coalesced"]
+if llm_coalesced or tts_coalesced:
+    st.sidebar.caption(f"Shared in-flight requests: {llm_coalesced} LLM, {tts_coalesced} TTS")
+busy = {name: p for name, p in scheduler.stats().items() if p["queue_depth"] or p["wait_p95_ms"]}
+if busy:
+    st.sidebar.caption("Outbound queues: " + ", ".join(
+        f"{name} {p['queue_depth']} waiting (p95 wait {p['wait_p95_ms'] or 0:.0f} ms)" for name, p in busy.items()
+    ))